@@ -30,6 +30,26 @@ class ChainstateManager;
 
 namespace rpc {
 
+// Each client request is read with a single recv() into a buffer of this
+// size, so a request (a whole batch included) must be smaller than it.
+// A request that fills the buffer is rejected with "Request too large"
+// rather than read in pieces; clients split larger batches (the functional
+// test framework keeps them under MAX_REQUEST_BYTES = 4000).
+constexpr size_t MAX_RPC_REQUEST_SIZE = 4096;
+
+using CommandExecutor = std::function<std::string(
+    const std::string &method, const std::vector<std::string> &params)>;
+
+/**
+ * Answer one raw request: a single request object, or a batch array of
+ * request objects answered with one array of results in the same order.
+ * Each batch element is parsed and executed on its own, so a malformed
+ * element yields an error entry without failing the rest of the batch.
+ * Requests of MAX_RPC_REQUEST_SIZE bytes or more are rejected unparsed.
+ */
+std::string DispatchRequest(const std::string &request,
+                            const CommandExecutor &execute);
+
 /**
  * RPC Server using Unix Domain Sockets (Local-Only Access)
  *
@@ -250,73 +250,108 @@ void RPCServer::ServerThread() {
   }
 }
 
-void RPCServer::HandleClient(int client_fd) {
-  // Check shutdown flag
-  if (shutting_down_.load(std::memory_order_acquire)) {
-    std::string error = util::JsonError("Server shutting down");
-    send(client_fd, error.c_str(), error.size(), 0);
-    return;
+namespace {
+
+// Extract method and params from one request object. Returns an error
+// response on failure, or an empty string on success.
+std::string ParseRequest(const nlohmann::json &j, std::string &method,
+                         std::vector<std::string> &params) {
+  if (!j.is_object() || !j.contains("method") || !j["method"].is_string()) {
+    return util::JsonError("Missing or invalid method field");
+  }
+
+  method = j["method"].get<std::string>();
+
+  // Extract params (optional)
+  if (j.contains("params")) {
+    if (j["params"].is_array()) {
+      for (const auto& param : j["params"]) {
+        if (param.is_string()) {
+          params.push_back(param.get<std::string>());
+        } else {
+          // Convert non-string params to string
+          params.push_back(param.dump());
+        }
+      }
+    } else if (j["params"].is_string()) {
+      // Single string param
+      params.push_back(j["params"].get<std::string>());
+    }
   }
+  return {};
+}
 
-  // SECURITY: Use vector to avoid buffer overflow
-  std::vector<char> buffer(4096);
-  ssize_t received = recv(client_fd, buffer.data(), buffer.size(), 0);
+} // namespace
 
-  if (received <= 0) {
-    return;
+std::string DispatchRequest(const std::string &request,
+                            const CommandExecutor &execute) {
+  // SECURITY: Bounds check before parsing. A request that fills the recv()
+  // buffer may have been truncated, so it is never executed.
+  if (request.size() >= MAX_RPC_REQUEST_SIZE) {
+    LOG_NET_ERROR("RPC request too large: {} bytes", request.size());
+    return util::JsonError("Request too large");
   }
 
-  // SECURITY: Bounds check before creating string
-  if (received >= static_cast<ssize_t>(buffer.size())) {
-    LOG_NET_ERROR("RPC request too large: {} bytes", received);
-    std::string error = util::JsonError("Request too large");
-    send(client_fd, error.c_str(), error.size(), 0);
-    return;
+  // SECURITY: Use proper JSON parsing instead of hand-rolled parser
+  nlohmann::json j;
+  try {
+    j = nlohmann::json::parse(request);
+  } catch (const nlohmann::json::exception& e) {
+    LOG_NET_WARN("RPC JSON parse error: {}", e.what());
+    return util::JsonError("Invalid JSON");
+  }
+
+  if (j.is_array()) {
+    // Batch: run each request in order and answer with one array of results.
+    // Handler output that is not valid JSON is returned as a JSON string.
+    nlohmann::json results = nlohmann::json::array();
+    for (const auto &item : j) {
+      std::string method;
+      std::vector<std::string> params;
+      std::string result = ParseRequest(item, method, params);
+      if (result.empty()) {
+        result = execute(method, params);
+      }
+      nlohmann::json parsed = nlohmann::json::parse(result, nullptr, false);
+      results.push_back(parsed.is_discarded() ? nlohmann::json(result) : parsed);
+    }
+    return results.dump(-1, ' ', false,
+                        nlohmann::json::error_handler_t::replace) + "\n";
   }
 
-  std::string request(buffer.data(), received);
-
-  // SECURITY: Use proper JSON parsing instead of hand-rolled parser
   std::string method;
   std::vector<std::string> params;
+  std::string response = ParseRequest(j, method, params);
+  if (response.empty()) {
+    // Execute command
+    response = execute(method, params);
+  }
+  return response;
+}
 
-  try {
-    nlohmann::json j = nlohmann::json::parse(request);
+void RPCServer::HandleClient(int client_fd) {
+  // Check shutdown flag
+  if (shutting_down_.load(std::memory_order_acquire)) {
+    std::string error = util::JsonError("Server shutting down");
+    send(client_fd, error.c_str(), error.size(), 0);
+    return;
+  }
 
-    // Extract method
-    if (!j.contains("method") || !j["method"].is_string()) {
-      std::string error = util::JsonError("Missing or invalid method field");
-      send(client_fd, error.c_str(), error.size(), 0);
-      return;
-    }
+  // SECURITY: Use vector to avoid buffer overflow. A single recv() bounds
+  // the request at MAX_RPC_REQUEST_SIZE; DispatchRequest rejects anything
+  // that fills the buffer.
+  std::vector<char> buffer(MAX_RPC_REQUEST_SIZE);
+  ssize_t received = recv(client_fd, buffer.data(), buffer.size(), 0);
 
-    method = j["method"].get<std::string>();
-
-    // Extract params (optional)
-    if (j.contains("params")) {
-      if (j["params"].is_array()) {
-        for (const auto& param : j["params"]) {
-          if (param.is_string()) {
-            params.push_back(param.get<std::string>());
-          } else {
-            // Convert non-string params to string
-            params.push_back(param.dump());
-          }
-        }
-      } else if (j["params"].is_string()) {
-        // Single string param
-        params.push_back(j["params"].get<std::string>());
-      }
-    }
-  } catch (const nlohmann::json::exception& e) {
-    LOG_NET_WARN("RPC JSON parse error: {}", e.what());
-    std::string error = util::JsonError("Invalid JSON");
-    send(client_fd, error.c_str(), error.size(), 0);
+  if (received <= 0) {
     return;
   }
 
-  // Execute command
-  std::string response = ExecuteCommand(method, params);
+  std::string response = DispatchRequest(
+      std::string(buffer.data(), received),
+      [this](const std::string &method, const std::vector<std::string> &params) {
+        return ExecuteCommand(method, params);
+      });
 
   // Send response
   send(client_fd, response.c_str(), response.size(), 0);
@@ -19,6 +19,7 @@ from pathlib import Path
 
 # Add test framework to path
 sys.path.insert(0, str(Path(__file__).parent / "test_framework"))
+from test_framework import BINARY_PATH
 from test_node import TestNode
 from util import pick_free_port, wait_until
 
@@ -36,7 +37,7 @@ def main():
     print("Starting adversarial_headers_wire test (opt-in)")
 
     test_dir = Path(tempfile.mkdtemp(prefix="unicity_wire_adv_"))
-    binary_path = Path(__file__).parent.parent.parent / "build" / "bin" / "unicityd"
+    binary_path = BINARY_PATH
 
     node = None
     try:
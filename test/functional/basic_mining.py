@@ -12,6 +12,7 @@ from pathlib import Path
 # Add test framework to path
 sys.path.insert(0, str(Path(__file__).parent / "test_framework"))
 
+from test_framework import BINARY_PATH
 from test_node import TestNode
 
 
@@ -21,7 +22,7 @@ def main():
 
     # Setup test directory
     test_dir = Path(tempfile.mkdtemp(prefix="unicity_test_"))
-    binary_path = Path(__file__).parent.parent.parent / "build" / "bin" / "unicityd"
+    binary_path = BINARY_PATH
 
     try:
         # Start a single node
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""pytest integration for the functional test scripts.
+
+Collects the p2p_* scripts as test items. Each item imports its script and
+calls main(); a return value of 0 (or None) is a pass. Every script picks
+its own ports via pick_free_ports() and its own temp datadir, so the items
+are independent and can run concurrently with pytest-xdist:
+
+    pytest -n auto test/functional
+    pytest -n auto -m "not slow" test/functional
+
+Node shutdown and datadir removal are handed to a session-wide background
+executor (util.defer_teardown), so one script's teardown overlaps with the
+next script's setup; the session waits for all of it before finishing.
+Each worker keeps a single scratch root for its test datadirs
+(util.make_test_dir) and removes it once at session end.
+
+The rpc_* scripts only need a single node, so their main() accepts a
+node argument: every rpc_* item in a worker reuses one session node,
+reset with util.reset_node_state() before each script, instead of
+starting and stopping unicityd per script.
+
+test_runner.py remains the primary (serial) entry point.
+"""
+
+import importlib.util
+import inspect
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent / "test_framework"))
+
+import util  # noqa: E402
+from test_node import TestNode  # noqa: E402
+
+# test_* files are standalone scripts driven through main(), not pytest modules
+collect_ignore_glob = ["test_*.py"]
+
+SCRIPT_PREFIXES = ("p2p_", "rpc_")
+
+# Mirrors the slow opt-in entries of test_runner.py's exclude list
+SLOW_SCRIPTS = {"p2p_batching.py"}
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: long-running functional script (opt-in in test_runner.py)")
+
+
+_teardown_executor = None
+_scratch_root = None
+_session_node = None
+
+
+def pytest_sessionstart(session):
+    global _teardown_executor, _scratch_root
+    _teardown_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="teardown")
+    util.set_teardown_executor(_teardown_executor)
+    _scratch_root = Path(tempfile.mkdtemp(prefix=f"unicity_worker_{os.getpid()}_", dir=util.tmpdir_root()))
+    util.set_scratch_root(_scratch_root)
+
+
+def session_node():
+    """The worker's shared single node, started on first use and reset for each caller."""
+    global _session_node
+    if _session_node is None:
+        _session_node = TestNode(0, _scratch_root / "session_node", extra_args=["--nolisten"])
+        _session_node.start()
+    else:
+        util.reset_node_state(_session_node)
+    return _session_node
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if _session_node is not None and _session_node.is_running():
+        _session_node.stop()
+    util.set_teardown_executor(None)
+    if _teardown_executor is not None:
+        _teardown_executor.shutdown(wait=True)
+    # Only after teardown has drained: nodes may still be writing into the root
+    util.set_scratch_root(None)
+    if _scratch_root is not None:
+        util.async_rmtree(_scratch_root)
+
+
+def pytest_collect_file(parent, file_path):
+    if file_path.suffix == ".py" and file_path.name.startswith(SCRIPT_PREFIXES):
+        return ScriptFile.from_parent(parent, path=file_path)
+    return None
+
+
+class ScriptFailed(Exception):
+    """Raised when a script's main() returns a non-zero exit code."""
+
+
+class ScriptFile(pytest.File):
+    def collect(self):
+        item = ScriptItem.from_parent(self, name=f"test_{self.path.stem}")
+        if self.path.name in SLOW_SCRIPTS:
+            item.add_marker(pytest.mark.slow)
+        yield item
+
+
+class ScriptItem(pytest.Item):
+    def runtest(self):
+        spec = importlib.util.spec_from_file_location(self.path.stem, self.path)
+        module = importlib.util.module_from_spec(spec)
+        # Registered so pickle can find the script's functions (multiprocessing)
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+        if "node" in inspect.signature(module.main).parameters:
+            rc = module.main(node=session_node())
+        else:
+            rc = module.main()
+        if rc not in (0, None):
+            raise ScriptFailed(f"{self.path.name} main() returned {rc}")
+
+    def repr_failure(self, excinfo):
+        if isinstance(excinfo.value, ScriptFailed):
+            return f"{excinfo.value} (see captured output above)"
+        return super().repr_failure(excinfo)
+
+    def reportinfo(self):
+        return self.path, 0, self.name
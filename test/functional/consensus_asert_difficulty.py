@@ -14,6 +14,7 @@ import struct
 
 # Add test framework to path
 sys.path.insert(0, str(Path(__file__).parent / "test_framework"))
+from test_framework import BINARY_PATH
 from test_node import TestNode
 
 TARGET_SPACING = 3600  # 1 hour
@@ -58,7 +59,7 @@ def main():
     print("Starting consensus_asert_difficulty test...")
 
     test_dir = Path(tempfile.mkdtemp(prefix="unicity_consensus_asert_"))
-    binary_path = Path(__file__).parent.parent.parent / "build" / "bin" / "unicityd"
+    binary_path = BINARY_PATH
 
     node = None
     try:
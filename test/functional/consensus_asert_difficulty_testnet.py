@@ -17,6 +17,7 @@ import struct
 
 # Add test framework to path
 sys.path.insert(0, str(Path(__file__).parent / "test_framework"))
+from test_framework import BINARY_PATH
 from test_node import TestNode
 
 TESTNET_SPACING = 120  # 2 minutes
@@ -54,7 +55,7 @@ def main():
     print("Starting consensus_asert_difficulty_testnet test...")
 
     test_dir = Path(tempfile.mkdtemp(prefix="unicity_consensus_asert_tn_"))
-    binary_path = Path(__file__).parent.parent.parent / "build" / "bin" / "unicityd"
+    binary_path = BINARY_PATH
 
     node = None
     try:
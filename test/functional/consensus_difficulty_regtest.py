@@ -14,6 +14,7 @@ import struct
 
 # Add test framework to path
 sys.path.insert(0, str(Path(__file__).parent / "test_framework"))
+from test_framework import BINARY_PATH
 from test_node import TestNode
 
 POW_LIMIT_BITS = 0x207fffff  # from regtest params
@@ -51,7 +52,7 @@ def main():
     print("Starting consensus_difficulty_regtest test...")
 
     test_dir = Path(tempfile.mkdtemp(prefix="unicity_consensus_diff_rt_"))
-    binary_path = Path(__file__).parent.parent.parent / "build" / "bin" / "unicityd"
+    binary_path = BINARY_PATH
 
     node = None
     try:
@@ -15,6 +15,7 @@ import struct
 
 # Add test framework to path
 sys.path.insert(0, str(Path(__file__).parent / "test_framework"))
+from test_framework import BINARY_PATH
 from test_node import TestNode
 
 TARGET_SPACING = 3600  # 1 hour
@@ -61,7 +62,7 @@ def main():
     print("Starting consensus_timestamp_bounds test...")
 
     test_dir = Path(tempfile.mkdtemp(prefix="unicity_consensus_ts_"))
-    binary_path = Path(__file__).parent.parent.parent / "build" / "bin" / "unicityd"
+    binary_path = BINARY_PATH
 
     node = None
     try:
@@ -8,8 +8,9 @@ import shutil
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent / "test_framework"))
+from test_framework import BINARY_PATH
 from test_node import TestNode
-from util import wait_until, pick_free_port
+from util import wait_until, pick_free_ports
 
 GREEN = '\033[92m'
 RED = '\033[91m'
@@ -38,7 +39,7 @@ def main():
     """
 
     test_dir = Path(tempfile.mkdtemp(prefix='cbc_persist_'))
-    binary_path = Path(__file__).parent.parent.parent / "build" / "bin" / "unicityd"
+    binary_path = BINARY_PATH
     nodes = []
 
     try:
@@ -51,10 +52,7 @@ def main():
         log("-" * 70, BLUE)
 
         # Dynamic ports
-        port0 = pick_free_port()
-        port1 = pick_free_port()
-        port2 = pick_free_port()
-        port3 = pick_free_port()
+        port0, port1, port2, port3 = pick_free_ports(4)
 
         # Node0: fresh datadir, mine 5 blocks
         log("Setting up Node0 with 5-block chain...", YELLOW)
@@ -10,6 +10,7 @@ import random
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent / "test_framework"))
+from test_framework import BINARY_PATH
 from test_node import TestNode
 from util import regtest_base_port
 
@@ -31,7 +32,7 @@ def main():
     BASE_PORT = regtest_base_port()
 
     test_dir = Path(tempfile.mkdtemp(prefix='cbc_chaos_'))
-    binary_path = Path(__file__).parent.parent.parent / "build" / "bin" / "unicityd"
+    binary_path = BINARY_PATH
     nodes = []
 
     try:
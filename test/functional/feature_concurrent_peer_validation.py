@@ -28,6 +28,7 @@ from pathlib import Path
 # Add test framework to path
 sys.path.insert(0, str(Path(__file__).parent / "test_framework"))
 
+from test_framework import BINARY_PATH
 from test_node import TestNode
 from util import regtest_base_port
 
@@ -58,7 +59,7 @@ def main():
     test_dir = Path(tempfile.mkdtemp(prefix='cbc_concurrent_'))
     log(f"Test directory: {test_dir}\n")
 
-    binary_path = Path(__file__).parent.parent.parent / "build" / "bin" / "unicityd"
+    binary_path = BINARY_PATH
     nodes = []
 
     try:
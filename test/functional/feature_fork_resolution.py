@@ -8,8 +8,9 @@ import shutil
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent / "test_framework"))
+from test_framework import BINARY_PATH
 from test_node import TestNode
-from util import pick_free_port
+from util import pick_free_ports
 
 GREEN = '\033[92m'
 RED = '\033[91m'
@@ -25,7 +26,7 @@ def log(msg, color=None):
 
 def main():
     test_dir = Path(tempfile.mkdtemp(prefix='cbc_fork_'))
-    binary_path = Path(__file__).parent.parent.parent / "build" / "bin" / "unicityd"
+    binary_path = BINARY_PATH
     nodes = []
 
     try:
@@ -39,9 +40,7 @@ def main():
         log("Expected: All nodes converge to 15 blocks\n", YELLOW)
 
         # Dynamic ports
-        port0 = pick_free_port()
-        port1 = pick_free_port()
-        port2 = pick_free_port()
+        port0, port1, port2 = pick_free_ports(3)
 
         # Create Node0 and mine 5 blocks
         log("Setting up Node0 with 5-block chain...", BLUE)
@@ -10,6 +10,7 @@ from pathlib import Path
 
 # Add test framework to path
 sys.path.insert(0, str(Path(__file__).parent / "test_framework"))
+from test_framework import BINARY_PATH
 from test_node import TestNode
 
 GREEN = '\033[92m'
@@ -43,7 +44,7 @@ def main():
     CHAIN_LEN = 120  # long enough to catch mid-sync, short enough to mine fast
 
     test_dir = Path(tempfile.mkdtemp(prefix='cbc_ibd_resume_'))
-    binary_path = Path(__file__).parent.parent.parent / "build" / "bin" / "unicityd"
+    binary_path = BINARY_PATH
 
     nodes = []
     try:
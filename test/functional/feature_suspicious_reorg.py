@@ -14,6 +14,7 @@ from pathlib import Path
 # Add test framework to path
 sys.path.insert(0, str(Path(__file__).parent / "test_framework"))
 
+from test_framework import BINARY_PATH
 from test_node import TestNode
 
 
@@ -23,7 +24,7 @@ def main():
 
     # Setup test directory
     test_dir = Path(tempfile.mkdtemp(prefix="cbc_susp_"))
-    binary_path = Path(__file__).parent.parent.parent / "build" / "bin" / "unicityd"
+    binary_path = BINARY_PATH
 
     node0 = None
     node1 = None
@@ -15,6 +15,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent / "test_framework"))
 
 from test_node import TestNode
+from util import tree_size
 
 
 def main():
@@ -127,7 +128,7 @@ def main():
 
         print(f"\n✓ Test chain saved successfully!")
         print(f"  Location: {chain_dir}")
-        print(f"  Size: {sum(f.stat().st_size for f in chain_dir.rglob('*') if f.is_file()) / (1024*1024):.1f} MB")
+        print(f"  Size: {tree_size(chain_dir) / (1024*1024):.1f} MB")
         print(f"\nTo use this chain in tests, copy it to your test node's datadir.")
 
     except KeyboardInterrupt:
@@ -16,6 +16,7 @@ import struct
 
 # Add test framework to path
 sys.path.insert(0, str(Path(__file__).parent / "test_framework"))
+from test_framework import BINARY_PATH
 from test_node import TestNode
 
 
@@ -52,7 +53,7 @@ def main():
     print("Starting orphan_pool_tests...")
 
     test_dir = Path(tempfile.mkdtemp(prefix="unicity_orphan_tests_"))
-    binary_path = Path(__file__).parent.parent.parent / "build" / "bin" / "unicityd"
+    binary_path = BINARY_PATH
 
     node = None
     try:
@@ -5,31 +5,29 @@ Ensures two nodes connect, report connected=true via RPC, and propagate blocks.
 """
 
 import sys
-import tempfile
-import shutil
 from pathlib import Path
 
 # Add test framework to path
 sys.path.insert(0, str(Path(__file__).parent / "test_framework"))
 
+from test_framework import BINARY_PATH
 from test_node import TestNode
-from util import wait_until, pick_free_port
+from util import connect_nodes, wait_until, wait_for_tip, pick_free_ports, defer_teardown, teardown_nodes, make_test_dir
 
 
 def main():
     print("Starting p2p_connect (strict) test...")
 
     # Setup test directory
-    test_dir = Path(tempfile.mkdtemp(prefix="unicity_test_"))
-    binary_path = Path(__file__).parent.parent.parent / "build" / "bin" / "unicityd"
+    test_dir = make_test_dir("unicity_test_")
+    binary_path = BINARY_PATH
 
     node0 = None
     node1 = None
 
     try:
         # Pick dynamic ports to avoid conflicts in parallel runs
-        port0 = pick_free_port()
-        port1 = pick_free_port()
+        port0, port1 = pick_free_ports(2)
 
         # Start node0 with listening enabled
         node0 = TestNode(0, test_dir / "node0", binary_path,
@@ -41,9 +39,13 @@ def main():
                         extra_args=[f"--port={port1}"])
         node1.start()
 
+        # Only polled in wait loops below, so a slightly stale getpeerinfo
+        # just costs a retry; reuse results within a cycle
+        for node in (node0, node1):
+            node.peer_info_ttl = 0.1
+
         # Connect node1 to node0
-        result = node1.add_node(f"127.0.0.1:{port0}", "add")
-        assert isinstance(result, dict) and result.get("success") is True, f"addnode failed: {result}"
+        assert connect_nodes(node1, port0), "node1 failed to connect to node0"
 
         # Wait for both nodes to report a connected peer via RPC
         def connected(n):
@@ -54,12 +56,18 @@ def main():
 
         # Generate and verify propagation
         node0.generate(5)
+        tip0 = node0.get_info()['bestblockhash']
+        assert wait_for_tip(node1, tip0, timeout=30), "node1 did not reach node0's tip"
 
         def synced():
-            i0 = node0.get_info()
-            i1 = node1.get_info()
+            # One batched round per node: tips must match and the link must stay up
+            i0, peers0 = node0.rpc_batch([("getinfo", []), ("getpeerinfo", [])])
+            i1, peers1 = node1.rpc_batch([("getinfo", []), ("getpeerinfo", [])])
+            if not (any(p.get("connected") is True for p in peers0) and
+                    any(p.get("connected") is True for p in peers1)):
+                return False
             return i1['blocks'] == i0['blocks'] == 5 and i0['bestblockhash'] == i1['bestblockhash']
-        assert wait_until(synced, timeout=30), "Blocks/tips did not synchronize"
+        assert synced(), "Blocks/tips did not synchronize"
 
         print("✓ p2p_connect (strict) passed")
         return 0
@@ -79,12 +87,8 @@ def main():
         return 1
 
     finally:
-        # Cleanup
-        if node0 and node0.is_running():
-            node0.stop()
-        if node1 and node1.is_running():
-            node1.stop()
-        shutil.rmtree(test_dir, ignore_errors=True)
+        # Cleanup (runs in the background under pytest, see conftest.py)
+        defer_teardown(teardown_nodes, [node0, node1], test_dir)
 
 
 if __name__ == "__main__":
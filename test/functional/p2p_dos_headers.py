@@ -6,42 +6,45 @@ verifies them via getpeerinfo.
 """
 
 import sys
-import tempfile
-import shutil
 from pathlib import Path
 
 # Add test framework to path
 sys.path.insert(0, str(Path(__file__).parent / "test_framework"))
 
+from test_framework import BINARY_PATH
 from test_node import TestNode
-from util import pick_free_port, wait_until
+from util import connect_nodes, pick_free_ports, wait_until, defer_teardown, teardown_nodes, make_test_dir
+
+
+def peer_connected(node, peer_id):
+    """Return True if node lists peer_id as a connected peer (one getpeerinfo)."""
+    peer = next((p for p in node.get_peer_info() if p.get("id") == peer_id), {})
+    return peer.get("connected", False)
 
 
 def main():
     print("Starting p2p_dos_headers (strict) test...")
 
     # Setup test directory
-    test_dir = Path(tempfile.mkdtemp(prefix="unicity_test_dos_"))
-    binary_path = Path(__file__).parent.parent.parent / "build" / "bin" / "unicityd"
+    test_dir = make_test_dir("unicity_test_dos_")
+    binary_path = BINARY_PATH
 
     node0 = None
     node1 = None
 
     try:
         # Start nodes
-        port0 = pick_free_port()
+        port0, port1 = pick_free_ports(2)
         node0 = TestNode(0, test_dir / "node0", binary_path,
                         extra_args=["--listen", f"--port={port0}"])
         node0.start()
 
-        port1 = pick_free_port()
         node1 = TestNode(1, test_dir / "node1", binary_path,
                         extra_args=[f"--port={port1}"])
         node1.start()
 
         # Connect and wait for peer listing
-        r = node1.add_node(f"127.0.0.1:{port0}", "add")
-        assert isinstance(r, dict) and r.get("success") is True, f"addnode failed: {r}"
+        assert connect_nodes(node1, port0), "node1 failed to connect to node0"
 
         def have_peer(n):
             peers = n.get_peer_info()
@@ -63,7 +66,7 @@ def main():
         # Force disconnect via RPC and verify drop
         d1 = node0.rpc("disconnectnode", str(peer_id))
         assert isinstance(d1, dict) and d1.get("success") is True, f"disconnectnode failed: {d1}"
-        assert wait_until(lambda: not any(p.get("id") == peer_id and p.get("connected") for p in node0.get_peer_info()), timeout=15), "Peer not disconnected after invalid_pow"
+        assert wait_until(lambda: not peer_connected(node0, peer_id), timeout=15), "Peer not disconnected after invalid_pow"
         # Ensure the outbound side also dropped before reconnecting
         peers1 = node1.get_peer_info()
         if isinstance(peers1, list) and len(peers1) > 0:
@@ -76,8 +79,7 @@ def main():
         node0.rpc("reportmisbehavior", "0", "clear_discouraged")
 
         # Reconnect for non_continuous test
-        r = node1.add_node(f"127.0.0.1:{port0}", "add")
-        assert isinstance(r, dict) and r.get("success") is True
+        assert connect_nodes(node1, port0), "node1 failed to reconnect to node0"
         assert wait_until(lambda: have_peer(node0), timeout=15), "node0 did not reconnect"
         peers0b = node0.get_peer_info(); new_peer_id = peers0b[0].get("id")
         assert isinstance(new_peer_id, int)
@@ -88,7 +90,7 @@ def main():
         assert res2.get("should_disconnect") in (True, "true"), f"should_disconnect not set after non_continuous: {res2}"
         d2 = node0.rpc("disconnectnode", str(new_peer_id))
         assert isinstance(d2, dict) and d2.get("success") is True, f"disconnectnode failed: {d2}"
-        assert wait_until(lambda: not any(p.get("id") == new_peer_id and p.get("connected") for p in node0.get_peer_info()), timeout=15), "Peer not disconnected after non_continuous"
+        assert wait_until(lambda: not peer_connected(node0, new_peer_id), timeout=15), "Peer not disconnected after non_continuous"
 
         print("✓ p2p_dos_headers (strict) passed")
         return 0
@@ -106,11 +108,8 @@ def main():
         return 1
 
     finally:
-        if node0 and node0.is_running():
-            node0.stop()
-        if node1 and node1.is_running():
-            node1.stop()
-        shutil.rmtree(test_dir, ignore_errors=True)
+        # Cleanup (runs in the background under pytest, see conftest.py)
+        defer_teardown(teardown_nodes, [node0, node1], test_dir)
 
 
 if __name__ == "__main__":
@@ -5,50 +5,49 @@ Ensures mocktime can be set/advanced/reset via RPC and nodes stay functional.
 """
 
 import sys
-import tempfile
-import shutil
 import time
 from pathlib import Path
 
 # Add test framework to path
 sys.path.insert(0, str(Path(__file__).parent / "test_framework"))
 
+from test_framework import BINARY_PATH
 from test_node import TestNode
-from util import wait_until, pick_free_port
+from util import connect_nodes, wait_for_tip, pick_free_ports, defer_teardown, teardown_nodes, make_test_dir
 
 
 def main():
     print("Starting p2p_eviction (mocktime strict) test...")
 
     # Setup test directory
-    test_dir = Path(tempfile.mkdtemp(prefix="unicity_test_eviction_"))
-    binary_path = Path(__file__).parent.parent.parent / "build" / "bin" / "unicityd"
+    test_dir = make_test_dir("unicity_test_eviction_")
+    binary_path = BINARY_PATH
 
     node0 = None
     node1 = None
 
     try:
         # Start nodes with dynamic ports
-        port0 = pick_free_port()
+        port0, port1 = pick_free_ports(2)
         node0 = TestNode(0, test_dir / "node0", binary_path,
                         extra_args=["--listen", f"--port={port0}"])
         node0.start()
 
-        port1 = pick_free_port()
         node1 = TestNode(1, test_dir / "node1", binary_path,
                         extra_args=[f"--port={port1}"])
         node1.start()
 
         # Connect node1 -> node0
-        res = node1.add_node(f"127.0.0.1:{port0}", "add")
-        assert isinstance(res, dict) and res.get("success") is True, f"addnode failed: {res}"
+        assert connect_nodes(node1, port0), "node1 failed to connect to node0"
 
         # Mine 3 blocks and wait for propagation
         node0.generate(3)
-        def propagated():
-            i0 = node0.get_info(); i1 = node1.get_info()
-            return i0['blocks'] >= 3 and i1['blocks'] >= 3 and i0['bestblockhash'] == i1['bestblockhash']
-        assert wait_until(propagated, timeout=30), "Failed to propagate initial blocks"
+        assert wait_for_tip(node1, node0.get_info()['bestblockhash'], timeout=30), "Failed to propagate initial blocks"
+        i0, peers0 = node0.rpc_batch([("getinfo", []), ("getpeerinfo", [])])
+        i1 = node1.get_info()
+        assert i0['blocks'] >= 3 and i1['blocks'] >= 3, f"Expected height >= 3, got {i0['blocks']} and {i1['blocks']}"
+        assert i0['bestblockhash'] == i1['bestblockhash'], "Tips differ after initial propagation"
+        assert len(peers0) >= 1, f"node0 lost its peer: {peers0}"
 
         # Strict mocktime checks
         current_time = int(time.time())
@@ -65,13 +64,11 @@ def main():
 
         # Verify node still works after mocktime operations
         node0.generate(2)
-        def synced5():
-            i0 = node0.get_info(); i1 = node1.get_info()
-            return i0['blocks'] == 5 and i1['blocks'] == 5 and i0['bestblockhash'] == i1['bestblockhash']
-        assert wait_until(synced5, timeout=30), "Failed to reach height 5 in sync"
-
-        # getpeerinfo must be a list
-        peers0 = node0.get_peer_info()
+        assert wait_for_tip(node1, node0.get_info()['bestblockhash'], timeout=30), "Failed to reach height 5 in sync"
+        i0, peers0 = node0.rpc_batch([("getinfo", []), ("getpeerinfo", [])])
+        i1 = node1.get_info()
+        assert i0['blocks'] == 5 and i1['blocks'] == 5, f"Expected height 5, got {i0['blocks']} and {i1['blocks']}"
+        assert i0['bestblockhash'] == i1['bestblockhash'], "Tips differ at height 5"
         assert isinstance(peers0, list), f"getpeerinfo must return a list, got {type(peers0)}"
 
         print("✓ p2p_eviction (mocktime strict) passed")
@@ -90,11 +87,8 @@ def main():
         return 1
 
     finally:
-        if node0 and node0.is_running():
-            node0.stop()
-        if node1 and node1.is_running():
-            node1.stop()
-        shutil.rmtree(test_dir, ignore_errors=True)
+        # Cleanup (runs in the background under pytest, see conftest.py)
+        defer_teardown(teardown_nodes, [node0, node1], test_dir)
 
 
 if __name__ == "__main__":
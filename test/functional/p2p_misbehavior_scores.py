@@ -6,20 +6,17 @@ PeerLifecycleManager misbehavior logic and disconnection behavior.
 """
 
 import sys
-import tempfile
-import shutil
-import time
 from pathlib import Path
 
 # Add test framework to path
 sys.path.insert(0, str(Path(__file__).parent / "test_framework"))
 
+from test_framework import BINARY_PATH
 from test_node import TestNode
-from util import pick_free_port, wait_until
+from util import connect_nodes, pick_free_ports, rpc_batch_nodes, wait_until, defer_teardown, teardown_nodes, make_test_dir
 
 
-def find_peer_id(node, expect_inbound=True):
-    peers = node.get_peer_info()
+def find_peer_id(peers, expect_inbound=True):
     # Return the first peer id with matching inbound flag if possible
     for p in peers:
         if bool(p.get("inbound", False)) == expect_inbound:
@@ -28,128 +25,73 @@ def find_peer_id(node, expect_inbound=True):
     return int(peers[0]["id"]) if peers else -1
 
 
-def wait_peer_count(node, count, timeout=10):
-    return wait_until(lambda: len(node.get_peer_info()) == count, timeout=timeout, check_interval=0.2)
+def wait_peer_count(nodes, count, timeout=10):
+    """Wait until every node in nodes (or a single node) lists exactly count peers."""
+    if not isinstance(nodes, (list, tuple)):
+        nodes = [nodes]
 
+    def reached():
+        results = rpc_batch_nodes([(n, [("getpeerinfo", [])]) for n in nodes])
+        return all(len(peers) == count for (peers,) in results)
 
-def run_case_invalid_pow(binary_path, base_dir):
-    a = b = None
-    try:
-        port_a = pick_free_port()
-        a = TestNode(0, base_dir / "A1", binary_path, extra_args=["--listen", f"--port={port_a}"])
-        a.start()
-        port_b = pick_free_port()
-        b = TestNode(1, base_dir / "B1", binary_path, extra_args=[f"--port={port_b}"])
-        b.start()
-        b.add_node(f"127.0.0.1:{port_a}")
-        assert wait_peer_count(a, 1, timeout=10)
-        peer_id = find_peer_id(a, expect_inbound=True)
-        res = a.rpc("reportmisbehavior", peer_id, "invalid_pow")
-        # Proactively disconnect to make the test deterministic
-        try:
-            a.rpc("disconnectnode", str(peer_id))
-        except Exception:
-            pass
-        ok = wait_peer_count(a, 0, timeout=10)
-        assert ok, "Peer did not disconnect after invalid_pow"
-        return True
-    finally:
-        if a and a.is_running(): a.stop()
-        if b and b.is_running(): b.stop()
+    return wait_until(reached, timeout=timeout, check_interval=0.2)
 
 
-def run_case_non_continuous(binary_path, base_dir):
-    a = b = None
-    try:
-        port_a = pick_free_port()
-        a = TestNode(0, base_dir / "A2", binary_path, extra_args=["--listen", f"--port={port_a}"])
-        a.start()
-        port_b = pick_free_port()
-        b = TestNode(1, base_dir / "B2", binary_path, extra_args=[f"--port={port_b}"])
-        b.start()
-        b.add_node(f"127.0.0.1:{port_a}")
-        assert wait_peer_count(a, 1, timeout=10)
-        peer_id = find_peer_id(a, expect_inbound=True)
-        res = a.rpc("reportmisbehavior", peer_id, "non_continuous", 5)
-        try:
-            a.rpc("disconnectnode", str(peer_id))
-        except Exception:
-            pass
-        ok = wait_peer_count(a, 0, timeout=10)
-        assert ok, "Peer did not disconnect after non_continuous x5"
-        return True
-    finally:
-        if a and a.is_running(): a.stop()
-        if b and b.is_running(): b.stop()
+# (reportmisbehavior type, extra args, failure label)
+CASES = [
+    ("invalid_pow", (), "invalid_pow"),
+    ("non_continuous", (5,), "non_continuous x5"),
+    ("increment_unconnecting", (10,), "unconnecting x10"),
+    ("too_many_orphans", (), "too_many_orphans"),
+]
 
 
-def run_case_unconnecting(binary_path, base_dir):
-    a = b = None
-    try:
-        port_a = pick_free_port()
-        a = TestNode(0, base_dir / "A3", binary_path, extra_args=["--listen", f"--port={port_a}"])
-        a.start()
-        port_b = pick_free_port()
-        b = TestNode(1, base_dir / "B3", binary_path, extra_args=[f"--port={port_b}"])
-        b.start()
-        b.add_node(f"127.0.0.1:{port_a}")
-        assert wait_peer_count(a, 1, timeout=10)
-        peer_id = find_peer_id(a, expect_inbound=True)
-        res = a.rpc("reportmisbehavior", peer_id, "increment_unconnecting", 10)
-        try:
-            a.rpc("disconnectnode", str(peer_id))
-        except Exception:
-            pass
-        ok = wait_peer_count(a, 0, timeout=10)
-        assert ok, "Peer did not disconnect after unconnecting x10"
-        return True
-    finally:
-        if a and a.is_running(): a.stop()
-        if b and b.is_running(): b.stop()
+def _setup_pair(binary_path, base_dir):
+    port_a, port_b = pick_free_ports(2)
+    a = TestNode(0, base_dir / "A", binary_path, extra_args=["--listen", f"--port={port_a}"])
+    a.start()
+    b = TestNode(1, base_dir / "B", binary_path, extra_args=[f"--port={port_b}"])
+    b.start()
+    return a, b, port_a
 
 
-def run_case_orphans(binary_path, base_dir):
-    a = b = None
+def _run_misbehavior(a, b, port_a, kind, *args, label=None):
+    assert connect_nodes(b, port_a), f"B failed to connect to A before {kind}"
+    assert wait_peer_count([a, b], 1, timeout=10)
+    peer_id = find_peer_id(a.get_peer_info(), expect_inbound=True)
+    a.rpc("reportmisbehavior", peer_id, kind, *args)
+    # Proactively disconnect to make the test deterministic
     try:
-        port_a = pick_free_port()
-        a = TestNode(0, base_dir / "A4", binary_path, extra_args=["--listen", f"--port={port_a}"])
-        a.start()
-        port_b = pick_free_port()
-        b = TestNode(1, base_dir / "B4", binary_path, extra_args=[f"--port={port_b}"])
-        b.start()
-        b.add_node(f"127.0.0.1:{port_a}")
-        assert wait_peer_count(a, 1, timeout=10)
-        peer_id = find_peer_id(a, expect_inbound=True)
-        res = a.rpc("reportmisbehavior", peer_id, "too_many_orphans")
-        try:
-            a.rpc("disconnectnode", str(peer_id))
-        except Exception:
-            pass
-        ok = wait_peer_count(a, 0, timeout=10)
-        assert ok, "Peer did not disconnect after too_many_orphans"
-        return True
-    finally:
-        if a and a.is_running(): a.stop()
-        if b and b.is_running(): b.stop()
+        a.rpc("disconnectnode", str(peer_id))
+    except Exception:
+        pass
+    ok = wait_peer_count(a, 0, timeout=10)
+    assert ok, f"Peer did not disconnect after {label or kind}"
+    # Reset for the next case: A discouraged 127.0.0.1, and B must have
+    # noticed the disconnect before it reconnects
+    a.rpc("reportmisbehavior", "0", "clear_discouraged")
+    assert wait_peer_count(b, 0, timeout=10), f"B still connected after {label or kind}"
+    return True
 
 
 def main():
     print("Starting p2p_misbehavior_scores test...")
-    test_dir = Path(tempfile.mkdtemp(prefix="unicity_misbehavior_"))
-    binary_path = Path(__file__).parent.parent.parent / "build" / "bin" / "unicityd"
+    test_dir = make_test_dir("unicity_misbehavior_")
+    binary_path = BINARY_PATH
+    a = b = None
     try:
-        assert run_case_invalid_pow(binary_path, test_dir)
-        assert run_case_non_continuous(binary_path, test_dir)
-        assert run_case_unconnecting(binary_path, test_dir)
-        assert run_case_orphans(binary_path, test_dir)
+        # One node pair serves every case; B reconnects between cases
+        a, b, port_a = _setup_pair(binary_path, test_dir)
+        for kind, args, label in CASES:
+            assert _run_misbehavior(a, b, port_a, kind, *args, label=label)
         print("✓ p2p_misbehavior_scores passed")
         return 0
     except Exception as e:
         print(f"✗ p2p_misbehavior_scores failed: {e}")
         return 1
     finally:
-        print(f"Cleaning up {test_dir}")
-        shutil.rmtree(test_dir, ignore_errors=True)
+        # Cleanup (runs in the background under pytest, see conftest.py)
+        defer_teardown(teardown_nodes, [a, b], test_dir)
 
 
 if __name__ == "__main__":
@@ -8,17 +8,15 @@ This verifies that node1 can relay blocks it receives from node0 to node2.
 """
 
 import sys
-import tempfile
-import shutil
-import time
 from pathlib import Path
 
 # Add test framework to path
 sys.path.insert(0, str(Path(__file__).parent / "test_framework"))
 
+from test_framework import BINARY_PATH
 from test_node import TestNode
-from util import wait_until
-from util import pick_free_port
+from util import wait_until, make_test_dir, remove_test_dir
+from util import pick_free_ports
 
 
 def main():
@@ -26,8 +24,8 @@ def main():
     print("Starting p2p_three_nodes test...")
 
     # Setup test directory
-    test_dir = Path(tempfile.mkdtemp(prefix="unicity_test_"))
-    binary_path = Path(__file__).parent.parent.parent / "build" / "bin" / "unicityd"
+    test_dir = make_test_dir("unicity_test_")
+    binary_path = BINARY_PATH
 
     node0 = None
     node1 = None
@@ -35,39 +33,44 @@ def main():
 
     try:
         # Start node0 (mining node) on dynamic port
-        port0 = pick_free_port()
+        port0, port1, port2 = pick_free_ports(3)
         print(f"Starting node0 (port {port0})...")
         node0 = TestNode(0, test_dir / "node0", binary_path,
                         extra_args=["--listen", f"--port={port0}"])
         node0.start()
 
         # Start node1 (relay node) on dynamic port
-        port1 = pick_free_port()
         print(f"Starting node1 (port {port1})...")
         node1 = TestNode(1, test_dir / "node1", binary_path,
                         extra_args=["--listen", f"--port={port1}"])
         node1.start()
 
         # Start node2 (receiving node) on dynamic port - must listen to receive relayed blocks
-        port2 = pick_free_port()
         print(f"Starting node2 (port {port2})...")
         node2 = TestNode(2, test_dir / "node2", binary_path,
                         extra_args=["--listen", f"--port={port2}"])
         node2.start()
 
-        time.sleep(1)
+        for node in (node0, node1, node2):
+            assert wait_until(node.is_ready, timeout=10, check_interval=0.02), f"{node} not ready"
 
         # Build network topology: node0 -> node1 -> node2
         print("\nBuilding network topology: node0 -> node1 -> node2")
 
+        marks = {node: node.log_offset() for node in (node0, node1, node2)}
+
         print("Connecting node1 to node0 (outbound)...")
         node1.add_node(f"127.0.0.1:{port0}", "add")
 
         print("Connecting node2 to node1 (outbound)...")
         node2.add_node(f"127.0.0.1:{port1}", "add")
 
-        # Wait for connections to establish
-        time.sleep(2)
+        # Wait for connections to establish (each completed handshake is logged)
+        for node, direction in ((node0, "inbound"), (node1, "outbound"),
+                                (node1, "inbound"), (node2, "outbound")):
+            assert node.wait_for_log_line(rf"New {direction} \S+ peer connected", timeout=5,
+                                          since=marks[node]), \
+                f"{node}: no {direction} handshake completed"
 
         # Verify all nodes start at genesis
         info0 = node0.get_info()
@@ -142,7 +145,7 @@ def main():
                 node.stop()
 
         print(f"Cleaning up test directory: {test_dir}")
-        shutil.rmtree(test_dir, ignore_errors=True)
+        remove_test_dir(test_dir)
 
     return 0
 
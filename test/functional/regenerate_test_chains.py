@@ -2,71 +2,155 @@
 """Regenerate large test chains for batching/persistence tests."""
 
 import sys
+import os
 import time
 import tempfile
 import shutil
+import hashlib
 import json
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent / "test_framework"))
 from test_node import TestNode
+from util import fast_rmtree
+
+# Mined chains keyed by chain_cache_key(); entries share inodes with test_chains/
+CHAIN_CACHE_DIR = Path(__file__).parent / "test_chains" / ".cache"
+
+
+def chain_cache_key(height, binary_path):
+    """Cache key for a mined chain: its height and the daemon build that mined it."""
+    binary_mtime = Path(binary_path).stat().st_mtime_ns
+    return hashlib.sha256(f"{height}|{binary_mtime}|regtest".encode()).hexdigest()[:16]
+
+
+def link_or_copy(src, dst):
+    """copytree copy_function: hardlink, or copy where linking isn't possible."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+# generate RPC limit per call (see RPCServer::HandleGenerate)
+MAX_GENERATE_BLOCKS = 1000
+
+# Logged by the node for every tip advance
+TIP_LOG_RE = re.compile(r"New best chain activated! Height: (\d+)")
+
+
+def report_mining_progress(node, height, stop, log, every=100, interval=0.5):
+    """Log progress every `every` blocks from the tip height in debug.log until stop is set."""
+    reported = 0
+    while not stop.wait(interval):
+        heights = TIP_LOG_RE.findall(node.read_log(20))
+        if not heights:
+            continue
+        tip = int(heights[-1])
+        if tip // every > reported // every and tip < height:
+            reported = tip
+            log(f"Progress: {tip}/{height} blocks ({int(tip / height * 100)}%)")
+
 
 def generate_chain(height, output_name):
     """Generate a test chain and save it."""
-    print(f"\n{'='*70}")
-    print(f"Generating {height}-block chain: {output_name}")
-    print(f"{'='*70}")
+    def log(msg):
+        # Chains are generated concurrently; tag and flush every line
+        print(f"[{output_name}] {msg}", flush=True)
+
+    log(f"Generating {height}-block chain")
     
     test_dir = Path(tempfile.mkdtemp(prefix=f"gen_{height}_"))
 
-    node = TestNode(0, test_dir / "node0")
+    node = TestNode(0, test_dir / "node0", extra_args=["--nolisten"])
+    cache_dir = CHAIN_CACHE_DIR / chain_cache_key(height, node.binary_path)
+    output_dir = Path(__file__).parent / "test_chains" / output_name
     try:
-        print("Starting node...")
+        if cache_dir.exists():
+            # Mined before by this same binary: link it into place instead
+            log(f"Using cached chain {cache_dir}")
+            if output_dir.exists():
+                fast_rmtree(output_dir)
+            shutil.copytree(cache_dir, output_dir, copy_function=link_or_copy)
+            log(f"✓ Successfully generated {output_name} (cached)")
+            return 0
+
+        log("Starting node...")
         node.start()
-        time.sleep(1)
         
-        print(f"Mining {height} blocks...")
+        log(f"Mining {height} blocks...")
         start = time.time()
         
-        # Mine in batches for progress updates
-        batch_size = 100
-        for i in range(0, height, batch_size):
-            remaining = min(batch_size, height - i)
-            node.generate(remaining)
-            print(f"  Progress: {i + remaining}/{height} blocks ({int((i + remaining) / height * 100)}%)")
+        # Mine in as few RPCs as the server allows; progress comes from the log
+        stop_progress = threading.Event()
+        progress = threading.Thread(
+            target=report_mining_progress, args=(node, height, stop_progress, log), daemon=True
+        )
+        progress.start()
+        try:
+            for i in range(0, height, MAX_GENERATE_BLOCKS):
+                count = min(MAX_GENERATE_BLOCKS, height - i)
+                node.generate(count, timeout=max(120, count * 0.5))
+        finally:
+            stop_progress.set()
+            progress.join()
+        log(f"Progress: {height}/{height} blocks (100%)")
         
         elapsed = time.time() - start
-        print(f"Mining complete in {elapsed:.1f}s")
+        log(f"Mining complete in {elapsed:.1f}s")
         
         info = node.get_info()
-        print(f"Final height: {info['blocks']}")
-        print(f"Tip: {info['bestblockhash'][:16]}...")
+        log(f"Final height: {info['blocks']}")
+        log(f"Tip: {info['bestblockhash'][:16]}...")
         
         node.stop()
-        time.sleep(1)
         
         # Save to test_chains
-        output_dir = Path(__file__).parent / "test_chains" / output_name
         if output_dir.exists():
-            shutil.rmtree(output_dir)
+            fast_rmtree(output_dir)
         output_dir.parent.mkdir(parents=True, exist_ok=True)
         
-        print(f"Saving chain to {output_dir}...")
-        shutil.copytree(test_dir / "node0", output_dir)
+        log(f"Saving chain to {output_dir}...")
+        # Hardlinked: the temp datadir is deleted afterwards, so no bytes need copying
+        shutil.copytree(test_dir / "node0", output_dir, copy_function=link_or_copy)
         
         # Verify
-        print("Verifying saved chain...")
+        log("Verifying saved chain...")
         with open(output_dir / "headers.json") as f:
             data = json.load(f)
             saved_height = data['block_count'] - 1
-            print(f"Saved {saved_height} blocks (+ genesis = {saved_height + 1} total)")
+            log(f"Saved {saved_height} blocks (+ genesis = {saved_height + 1} total)")
             assert saved_height == height, f"Height mismatch: expected {height}, got {saved_height}"
+
+        # Record the tip in a sidecar so consumers can check what they loaded
+        metadata = {
+            "blocks": height,
+            "tip": info['bestblockhash'],
+            "generated": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "time_taken_seconds": int(elapsed)
+        }
+        with open(output_dir / "chain_metadata.json", 'w') as f:
+            json.dump(metadata, f, indent=2)
+
+        # Populate the cache; renamed into place so a partial copy is never used
+        staging = cache_dir.with_name(f"{cache_dir.name}.tmp{os.getpid()}")
+        shutil.copytree(output_dir, staging, copy_function=link_or_copy)
+        try:
+            staging.rename(cache_dir)
+        except OSError:
+            if not cache_dir.is_dir():
+                raise
+            # Another worker or run cached the same chain first; keep theirs
+            fast_rmtree(staging)
         
-        print(f"✓ Successfully generated {output_name}")
+        log(f"✓ Successfully generated {output_name}")
         return 0
         
     except Exception as e:
-        print(f"✗ Error: {e}")
+        log(f"✗ Error: {e}")
         import traceback
         traceback.print_exc()
         return 1
@@ -74,7 +158,7 @@ def generate_chain(height, output_name):
         if node:
             node.stop()
         # Clean up temp dir
-        shutil.rmtree(test_dir, ignore_errors=True)
+        fast_rmtree(test_dir)
 
 def main():
     print("\n" + "="*70)
@@ -88,11 +172,18 @@ def main():
         (12000, "chain_12000_blocks"),
     ]
     
-    for height, name in chains:
-        result = generate_chain(height, name)
-        if result != 0:
+    # Each chain mines in its own process, datadir and RPC socket
+    failed = []
+    with ProcessPoolExecutor(max_workers=min(len(chains), os.cpu_count() or 1)) as pool:
+        futures = {pool.submit(generate_chain, height, name): name for height, name in chains}
+        for future in as_completed(futures):
+            if future.result() != 0:
+                failed.append(futures[future])
+
+    if failed:
+        for name in failed:
             print(f"\n✗ Failed to generate {name}")
-            return result
+        return 1
     
     print("\n" + "="*70)
     print("✓ ALL TEST CHAINS REGENERATED SUCCESSFULLY")
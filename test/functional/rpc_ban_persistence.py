@@ -5,45 +5,53 @@ Verifies setban persists across restart and clearbanned removes entries.
 """
 
 import sys
-import tempfile
-import shutil
-import time
 from pathlib import Path
 
 # Add test framework to path
 sys.path.insert(0, str(Path(__file__).parent / "test_framework"))
+from test_framework import BINARY_PATH
 from test_node import TestNode
+from util import make_test_dir, remove_test_dir
+
+# Run by test_runner.py in a fork of the runner (see run_test)
+__in_process__ = True
 
 
 def listbanned_map(node):
-    arr = node.rpc("listbanned")
+    return banned_map(node.rpc("listbanned"))
+
+
+def banned_map(arr):
     assert isinstance(arr, list), f"listbanned must return a list, got {type(arr)}"
     return {e.get("address"): e for e in arr if isinstance(e, dict)}
 
 
-def main():
+def main(node=None):
+    """Run the test; a passed-in node is reused and left running (see conftest.py)."""
     print("Starting rpc_ban_persistence (strict) test...")
 
-    test_dir = Path(tempfile.mkdtemp(prefix="unicity_ban_persist_"))
-    binary_path = Path(__file__).parent.parent.parent / "build" / "bin" / "unicityd"
+    owns_node = node is None
+    test_dir = make_test_dir("unicity_ban_persist_") if owns_node else None
+    binary_path = BINARY_PATH
 
-    node = None
     try:
-        node = TestNode(0, test_dir / "node0", binary_path, extra_args=["--regtest"])  # default regtest
-        node.start()
+        if owns_node:
+            node = TestNode(0, test_dir / "node0", binary_path, extra_args=["--regtest"])  # default regtest
+            node.start()
 
         # Add a couple bans
-        r1 = node.rpc("setban", "127.0.0.2", "add")
-        r2 = node.rpc("setban", "127.0.0.3", "add")
+        r1, r2, arr = node.rpc_batch([
+            ("setban", ["127.0.0.2", "add"]),
+            ("setban", ["127.0.0.3", "add"]),
+            ("listbanned", []),
+        ])
         assert isinstance(r1, dict) and r1.get("success") is True, f"setban failed: {r1}"
         assert isinstance(r2, dict) and r2.get("success") is True, f"setban failed: {r2}"
-        banned = listbanned_map(node)
+        banned = banned_map(arr)
         assert "127.0.0.2" in banned and "127.0.0.3" in banned
 
-        # Restart
+        # Restart on the same datadir
         node.stop()
-        time.sleep(1)
-        node = TestNode(0, test_dir / "node0", binary_path, extra_args=["--regtest"])  # same datadir
         node.start()
 
         # Verify bans persisted
@@ -64,11 +72,12 @@ def main():
         return 1
 
     finally:
-        if node and node.is_running():
-            print("Stopping node...")
-            node.stop()
-        print(f"Cleaning up {test_dir}")
-        shutil.rmtree(test_dir, ignore_errors=True)
+        if owns_node:
+            if node and node.is_running():
+                print("Stopping node...")
+                node.stop()
+            print(f"Cleaning up {test_dir}")
+            remove_test_dir(test_dir)
 
 
 if __name__ == "__main__":
@@ -7,25 +7,30 @@ structured JSON.
 """
 
 import sys
-import tempfile
-import shutil
 from pathlib import Path
 
 # Add test framework to path
 sys.path.insert(0, str(Path(__file__).parent / "test_framework"))
+from test_framework import BINARY_PATH
 from test_node import TestNode
+from util import make_test_dir, remove_test_dir
 
+# Run by test_runner.py in a fork of the runner (see run_test)
+__in_process__ = True
 
-def main():
+
+def main(node=None):
+    """Run the test; a passed-in node is reused and left running (see conftest.py)."""
     print("Starting rpc_errors_and_help (strict) test...")
 
-    test_dir = Path(tempfile.mkdtemp(prefix="unicity_rpc_errors_"))
-    binary_path = Path(__file__).parent.parent.parent / "build" / "bin" / "unicityd"
+    owns_node = node is None
+    test_dir = make_test_dir("unicity_rpc_errors_") if owns_node else None
+    binary_path = BINARY_PATH
 
-    node = None
     try:
-        node = TestNode(0, test_dir / "node0", binary_path, extra_args=["--regtest"])  # default regtest
-        node.start()
+        if owns_node:
+            node = TestNode(0, test_dir / "node0", binary_path, extra_args=["--regtest"])  # default regtest
+            node.start()
 
         # 1) Unknown command must return JSON with exact error
         res = node.rpc("idontexist")
@@ -55,11 +60,12 @@ def main():
         return 1
 
     finally:
-        if node and node.is_running():
-            print("Stopping node...")
-            node.stop()
-        print(f"Cleaning up {test_dir}")
-        shutil.rmtree(test_dir, ignore_errors=True)
+        if owns_node:
+            if node and node.is_running():
+                print("Stopping node...")
+                node.stop()
+            print(f"Cleaning up {test_dir}")
+            remove_test_dir(test_dir)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,21 @@
+"""Functional test framework for unicityd.
+
+BINARY_PATH is the daemon the tests run: $UNICITYD if set, otherwise
+<repo>/build/bin/unicityd, resolved once per process. BINARY_STAT is the
+os.stat() result for that resolved path, taken at the same time, or None
+if it doesn't exist; its st_mtime_ns keys caches that must not outlive a
+rebuild (see shared_datadir.py).
+"""
+
+import os
+from pathlib import Path
+
+BINARY_PATH = Path(
+    os.environ.get("UNICITYD")
+    or Path(__file__).resolve().parents[3] / "build" / "bin" / "unicityd"
+).resolve()
+
+try:
+    BINARY_STAT = BINARY_PATH.stat()
+except OSError:
+    BINARY_STAT = None
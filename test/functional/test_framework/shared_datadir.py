@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Template datadir shared by tests that start from a fresh node.
+
+A node's first start creates its datadir from scratch (genesis header,
+peer and ban stores). get_template_datadir() does that once per unicityd
+build and chain, and clone_datadir() gives each test its own copy of the
+result, so tests start from an initialized datadir instead of an empty one.
+"""
+
+import fcntl
+import hashlib
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+from test_framework import BINARY_PATH, BINARY_STAT
+from test_node import TestNode, resolve_unicityd
+from util import fast_copytree, fast_rmtree
+
+
+def get_template_datadir(binary_path=None, chain="regtest"):
+    """
+    Return the template datadir for this binary and chain, building it if needed.
+
+    Templates live under the system temp dir, named after the binary's path
+    and chain plus its mtime (BINARY_STAT's for BINARY_PATH), so a rebuild
+    gets a new template and the next build removes the old one. Concurrent
+    builders (parallel test scripts) serialize on an flock and build only
+    once; the finished template is renamed into place, so a partial one is
+    never visible.
+    """
+    binary = Path(binary_path).resolve() if binary_path else resolve_unicityd().resolve()
+    if binary == BINARY_PATH and BINARY_STAT is not None:
+        mtime_ns = BINARY_STAT.st_mtime_ns
+    else:
+        mtime_ns = binary.stat().st_mtime_ns
+    owner = hashlib.sha256(f"{binary}|{chain}".encode()).hexdigest()[:16]
+    prefix = f"unicity-template-{owner}-"
+    template = Path(tempfile.gettempdir()) / f"{prefix}{mtime_ns}"
+    if template.exists():
+        return template
+
+    with open(template.with_name(f"{template.name}.lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if template.exists():
+            return template
+
+        staging = Path(tempfile.mkdtemp(prefix=f"{template.name}.build.", dir=template.parent))
+        try:
+            node = TestNode(0, staging / "datadir", binary, extra_args=["--nolisten"], chain=chain)
+            node.start()
+            node.stop()
+            # Per-run state, not part of the template
+            for name in ("debug.log", "node.sock"):
+                (staging / "datadir" / name).unlink(missing_ok=True)
+            (staging / "datadir").rename(template)
+        finally:
+            fast_rmtree(staging)
+        _prune_templates(template, prefix)
+    return template
+
+
+def _prune_templates(template, prefix):
+    """
+    Remove the templates, locks and staging dirs under prefix other than template.
+
+    Called with template's lock held, so its own leftover staging dirs are
+    from crashed builds. Older builds are only removed if their lock can be
+    taken, i.e. no other process is building them right now.
+    """
+    versions = {}
+    for entry in template.parent.glob(f"{prefix}*"):
+        versions.setdefault(entry.name.split(".", 1)[0], []).append(entry)
+
+    for name, entries in versions.items():
+        if name == template.name:
+            for entry in entries:
+                if entry.name.startswith(f"{name}.build."):
+                    fast_rmtree(entry)
+            continue
+        lock_path = template.with_name(f"{name}.lock")
+        try:
+            with open(lock_path, "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                for entry in entries:
+                    if entry != lock_path:
+                        fast_rmtree(entry)
+                lock_path.unlink(missing_ok=True)
+        except OSError:
+            # BlockingIOError: being built; anything else: not ours to remove
+            pass
+
+
+def clone_datadir(template, dst):
+    """
+    Copy a template datadir to dst (which must not exist) and return dst.
+
+    Uses cp --reflink=auto, which shares data blocks on btrfs/XFS and
+    copies elsewhere; falls back to a Python copy where cp lacks it.
+    """
+    dst = Path(dst)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if shutil.which("cp"):
+        result = subprocess.run(
+            ["cp", "-R", "--reflink=auto", "--", str(template), str(dst)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        if result.returncode == 0:
+            return dst
+        fast_rmtree(dst)
+    fast_copytree(template, dst)
+    return dst
@@ -2,12 +2,16 @@
 """Test node management for functional tests."""
 
 import os
+import socket
 import subprocess
 import time
 import tempfile
 import shutil
 import json
+import re
 import signal as _signal
+import threading
+from collections import deque
 from pathlib import Path
 
 
@@ -44,6 +48,20 @@ def resolve_unicityd():
 class TestNode:
     """Represents a unicity node for testing."""
 
+    # get_peer_info() results are reused for this long (seconds); 0 disables.
+    # Opt-in per node: a cached result doesn't see peer changes made from
+    # the other side (remote addnode/disconnect, bans, evictions).
+    peer_info_ttl = 0
+
+    # RPCs that change this node's peer table and so invalidate the cache
+    PEER_MUTATING_RPCS = frozenset({
+        "addnode", "disconnectnode", "setban", "clearbanned", "reportmisbehavior", "stop",
+    })
+
+    # The RPC server reads each request with a single 4 KiB recv()
+    # (MAX_RPC_REQUEST_SIZE in include/network/rpc_server.hpp)
+    MAX_REQUEST_BYTES = 4000
+
     def __init__(self, index, datadir, binary_path=None, extra_args=None, chain="regtest"):
         """
         Initialize a test node.
@@ -61,6 +79,15 @@ class TestNode:
         self.chain = chain
         self.process = None
         self.rpc_socket = self.datadir / "node.sock"
+        # Fixed prefix of every unicity-cli invocation, built once
+        self._cli_prefix = [str(self.binary_path.parent / "unicity-cli"), f"--datadir={self.datadir}"]
+        self._peers_cache = None
+        self._peers_cache_time = 0.0
+        # Whether the server accepts array requests; None until first tried
+        self._native_batch = None
+        # Last lines of the daemon's stdout/stderr, filled by _drain_output
+        self._output_tail = deque(maxlen=200)
+        self._drainer = None
 
     def start(self, extra_args=None):
         """Start the node process."""
@@ -86,30 +113,72 @@ class TestNode:
             args.extend(extra_args)
 
         # Start process
-        # Use DEVNULL to avoid blocking on stdout/stderr buffers
+        # A drainer thread keeps the pipe empty and the last lines for diagnostics
         self.process = subprocess.Popen(
             args,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            text=True
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            errors="replace",
+            # Lets CPython use posix_spawn instead of fork+exec; the
+            # framework's own fds are non-inheritable regardless
+            close_fds=False
         )
+        self._output_tail.clear()
+        self._drainer = threading.Thread(
+            target=self._drain_output, args=(self.process.stdout,), daemon=True
+        )
+        self._drainer.start()
 
         # Wait for RPC socket to be created
         self.wait_for_rpc_connection()
 
     def stop(self):
         """Stop the node process."""
+        if self.stop_async():
+            self.wait_stopped(10)
+
+    def stop_async(self):
+        """
+        Ask the node to shut down (SIGTERM) without waiting for it.
+
+        Returns True if the node is stopping and wait_stopped() must follow;
+        stopping several nodes this way lets their shutdowns overlap.
+        """
+        self._peers_cache = None
         if not self.process:
-            return
+            return False
 
         self.process.terminate()
-        try:
-            self.process.wait(timeout=10)
-        except subprocess.TimeoutExpired:
+        return True
+
+    def wait_stopped(self, timeout=10):
+        """Finish stop_async(): wait for exit (killing after timeout) and return the exit code."""
+        if not self.process:
+            return 0
+
+        returncode = self.wait_for_exit(timeout)
+        if returncode is None:
             self.process.kill()
-            self.process.wait()
+            returncode = self.process.wait()
+        else:
+            # A clean shutdown unlinks the RPC socket before the process exits
+            self.wait_for_socket_removed(timeout=1)
 
+        self._drainer.join(timeout=1)
+        self.process.stdout.close()
         self.process = None
+        return returncode
+
+    def _drain_output(self, stream):
+        """Read the daemon's output until EOF, keeping only the last lines."""
+        try:
+            for line in stream:
+                self._output_tail.append(line)
+        except (OSError, ValueError):
+            # Stream closed by stop()
+            pass
 
     def send_signal(self, sig):
         """Send a POSIX signal to the node process."""
@@ -125,24 +194,40 @@ class TestNode:
         except subprocess.TimeoutExpired:
             return None
 
+    def wait_for_socket_removed(self, timeout=5):
+        """Wait for the RPC socket file to disappear; False on timeout."""
+        deadline = time.monotonic() + timeout
+        while self.rpc_socket.exists():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.02)
+        return True
+
     def cleanup(self):
         """Clean up node data directory."""
         if self.datadir.exists():
             shutil.rmtree(self.datadir)
 
     def wait_for_rpc_connection(self, timeout=30):
-        """Wait for RPC socket to be available and accepting connections."""
-        start_time = time.time()
-        while time.time() - start_time < timeout:
+        """
+        Wait for RPC socket to be available and accepting connections.
+
+        Re-checks with exponential backoff from 5 ms up to 50 ms, so a node
+        that comes up quickly is seen within a few milliseconds.
+        """
+        deadline = time.monotonic() + timeout
+        delay = 0.005
+        while time.monotonic() < deadline:
             # Check if process crashed
             if not self.is_running():
-                # Process died, read output
-                stdout, stderr = self.process.communicate() if self.process else ("", "")
+                # Process died; the drainer has its last output lines
+                if self._drainer:
+                    self._drainer.join(timeout=1)
+                output = ''.join(self._output_tail)
                 log_content = self.read_log() if self.get_log_path().exists() else ""
                 raise Exception(
                     f"Node {self.index} process died during startup.\n"
-                    f"Stdout: {stdout}\n"
-                    f"Stderr: {stderr}\n"
+                    f"Output: {output}\n"
                     f"Log: {log_content}"
                 )
 
@@ -152,12 +237,12 @@ class TestNode:
                     self.get_info()
                     # Success! RPC is working
                     return
-                except Exception as e:
-                    # RPC not ready yet, wait a bit
-                    time.sleep(0.5)
-                    continue
+                except Exception:
+                    # RPC not ready yet
+                    pass
 
-            time.sleep(0.1)
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
 
         # Timeout - provide debug info
         log_content = self.read_log() if self.get_log_path().exists() else "No log file"
@@ -168,6 +253,13 @@ class TestNode:
             f"Last log lines:\n{log_content}"
         )
 
+    def is_ready(self):
+        """Return True if the node answers getinfo with a valid height."""
+        try:
+            return isinstance(self.get_info(timeout=5).get("blocks"), int)
+        except Exception:
+            return False
+
     def is_running(self):
         """Check if node process is running."""
         if not self.process:
@@ -179,55 +271,209 @@ class TestNode:
         return self.datadir / "debug.log"
 
     def read_log(self, lines=50):
-        """Read last N lines from debug.log."""
+        """
+        Read last N lines from debug.log.
+
+        Reads backwards from the end in 64 KiB chunks until enough lines
+        are buffered, so the cost depends on N rather than on the log size.
+        """
         log_path = self.get_log_path()
         if not log_path.exists():
             return ""
+        if lines <= 0:
+            return ""
 
-        with open(log_path, 'r') as f:
-            all_lines = f.readlines()
-            return ''.join(all_lines[-lines:])
+        chunk_size = 65536
+        with open(log_path, 'rb') as f:
+            pos = f.seek(0, os.SEEK_END)
+            buf = bytearray()
+            # One extra newline: the last line normally ends with one
+            while pos > 0 and buf.count(b"\n") <= lines:
+                step = min(chunk_size, pos)
+                pos -= step
+                f.seek(pos)
+                buf[0:0] = f.read(step)
+
+        tail = buf.decode("utf-8", "replace").splitlines(keepends=True)
+        return ''.join(tail[-lines:])
+
+    def log_offset(self):
+        """Current size of debug.log in bytes (a mark for wait_for_log_line)."""
+        try:
+            return self.get_log_path().stat().st_size
+        except FileNotFoundError:
+            return 0
 
-    def wait_for_log(self, pattern, timeout=10):
-        """Wait for a pattern to appear in the log."""
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            log_content = self.read_log()
-            if pattern in log_content:
-                return True
-            time.sleep(0.5)
-        return False
+    def wait_for_log_line(self, regex, timeout=10, since=0, check_interval=0.02):
+        """
+        Wait for a complete debug.log line matching regex.
+
+        Follows the log from byte offset since (take it with log_offset()
+        before the action being waited on). Each poll stats the file and
+        reads only what was appended since the previous poll.
+
+        Returns:
+            The matching line, or None on timeout
+        """
+        pattern = re.compile(regex)
+        log_path = self.get_log_path()
+        offset = since
+        partial = b""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                size = log_path.stat().st_size
+            except FileNotFoundError:
+                size = 0
+            if size < offset:
+                # Log was truncated or recreated; start over
+                offset, partial = 0, b""
+            if size > offset:
+                with open(log_path, 'rb') as f:
+                    f.seek(offset)
+                    data = f.read(size - offset)
+                offset += len(data)
+                lines = (partial + data).split(b"\n")
+                partial = lines.pop()
+                for raw in lines:
+                    line = raw.decode("utf-8", "replace")
+                    if pattern.search(line):
+                        return line
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(check_interval)
+
+    def wait_for_log(self, pattern, timeout=10, check_interval=0.1):
+        """
+        Wait for a pattern to appear in the log.
+
+        Looks at the tail returned by read_log(), which is only re-read
+        when debug.log has changed size since the previous check; an idle
+        poll costs a single stat().
+        """
+        deadline = time.monotonic() + timeout
+        last_size = None
+        while True:
+            size = self.log_offset()
+            if size != last_size:
+                last_size = size
+                if pattern in self.read_log():
+                    return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(check_interval)
 
     def rpc(self, method, *params, timeout=30):
         """
         Call RPC method.
 
-        Uses unicity-cli to communicate via Unix socket.
+        Speaks the RPC server's protocol directly over the node's Unix
+        socket: one JSON request per connection, response read until the
+        server closes it. Falls back to unicity-cli when the socket can't be
+        connected, so an unreachable node fails exactly as before.
         """
-        cli_path = self.binary_path.parent / "unicity-cli"
+        if method in self.PEER_MUTATING_RPCS:
+            self._peers_cache = None
 
-        args = [
-            str(cli_path),
-            f"--datadir={self.datadir}",
-            method
-        ]
-        args.extend(str(p) for p in params)
+        sock = self._connect_rpc(timeout)
+        if sock is None:
+            return self._cli_rpc(method, params, timeout)
+
+        request = {"method": method, "params": [str(p) for p in params]}
+        return self._parse_rpc_result(method, 0, self._exchange(sock, request, method, timeout), "")
+
+    def rpc_batch(self, calls, timeout=30):
+        """
+        Call several RPC methods in a single round.
+
+        The calls are sent as one JSON array over one connection; the
+        server runs them in order and answers with an array of results.
+        The first batch doubles as the capability probe: a server without
+        batch support rejects the array before running any of it, and from
+        then on the calls are made back to back over the direct socket
+        client against a shared deadline. Batches too large for the
+        server's request buffer take the same sequential path.
+
+        Args:
+            calls: Iterable of (method, params) tuples
+            timeout: Maximum time to wait for the whole batch in seconds
 
+        Returns:
+            List of results, in the same order as calls
+        """
+        calls = [(method, [str(p) for p in params]) for method, params in calls]
+        if any(method in self.PEER_MUTATING_RPCS for method, _ in calls):
+            self._peers_cache = None
+
+        request = [{"method": method, "params": params} for method, params in calls]
+        if calls and self._native_batch is not False and len(json.dumps(request)) < self.MAX_REQUEST_BYTES:
+            sock = self._connect_rpc(timeout)
+            if sock is not None:
+                reply = self._parse_rpc_result("batch", 0, self._exchange(sock, request, "batch", timeout), "")
+                if isinstance(reply, list) and len(reply) == len(calls):
+                    self._native_batch = True
+                    return [r.strip() if isinstance(r, str) else r for r in reply]
+                if self._native_batch:
+                    raise Exception(f"RPC batch failed: {reply}")
+                self._native_batch = False
+
+        deadline = time.monotonic() + timeout
+        results = []
+        for method, params in calls:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"RPC batch timed out after {timeout}s")
+            results.append(self.rpc(method, *params, timeout=remaining))
+        return results
+
+    def _exchange(self, sock, request, method, timeout):
+        """Send one JSON request on sock and read the response until EOF."""
+        chunks = []
+        try:
+            with sock:
+                sock.sendall(json.dumps(request).encode() + b"\n")
+                while chunk := sock.recv(65536):
+                    chunks.append(chunk)
+        except socket.timeout:
+            raise TimeoutError(f"RPC {method} timed out after {timeout}s") from None
+        return b"".join(chunks).decode("utf-8", "replace")
+
+    def _connect_rpc(self, timeout):
+        """Connect to the node's RPC socket; None if it can't be reached."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(str(self.rpc_socket))
+        except OSError:
+            sock.close()
+            return None
+        return sock
+
+    def _cli_rpc(self, method, params, timeout):
+        """Call an RPC method through unicity-cli."""
         result = subprocess.run(
-            args,
+            self._cli_args(method, params),
             capture_output=True,
             text=True,
             timeout=timeout
         )
+        return self._parse_rpc_result(method, result.returncode, result.stdout, result.stderr)
 
-        if result.returncode != 0:
-            raise Exception(f"RPC {method} failed: {result.stderr}")
+    def _cli_args(self, method, params):
+        """Build the unicity-cli command line for an RPC call."""
+        return [*self._cli_prefix, method, *(str(p) for p in params)]
+
+    @staticmethod
+    def _parse_rpc_result(method, returncode, stdout, stderr):
+        """Decode an RPC response into a JSON value or trimmed string."""
+        if returncode != 0:
+            raise Exception(f"RPC {method} failed: {stderr}")
 
         # Try to parse JSON response first; if it fails, return raw string (trimmed)
         try:
-            return json.loads(result.stdout)
+            return json.loads(stdout)
         except json.JSONDecodeError:
-            return result.stdout.strip()
+            return stdout.strip()
 
     def generate(self, nblocks, address=None, timeout=120):
         """Generate blocks with configurable timeout.
@@ -243,13 +489,39 @@ class TestNode:
         return self.rpc("getinfo", timeout=timeout)
 
     def get_peer_info(self, timeout=30):
-        """Get peer connection info with configurable timeout."""
-        return self.rpc("getpeerinfo", timeout=timeout)
+        """
+        Get peer connection info with configurable timeout.
+
+        A result younger than peer_info_ttl is returned from cache, so
+        back-to-back lookups within one wait cycle cost a single RPC.
+        Peer-mutating RPCs issued through this node drop the cache.
+        """
+        now = time.monotonic()
+        if self._peers_cache is not None and now - self._peers_cache_time < self.peer_info_ttl:
+            return self._peers_cache
+        peers = self.rpc("getpeerinfo", timeout=timeout)
+        self._peers_cache = peers
+        self._peers_cache_time = time.monotonic()
+        return peers
 
     def add_node(self, node_addr, command="add"):
         """Add a peer node."""
         return self.rpc("addnode", node_addr, command)
 
+    def disconnect_all(self):
+        """
+        Disconnect every current peer.
+
+        One getpeerinfo, then all disconnectnode calls as a single batch.
+
+        Returns:
+            Number of peers a disconnect was issued for
+        """
+        peer_ids = [p["id"] for p in self.get_peer_info() if isinstance(p.get("id"), int)]
+        if peer_ids:
+            self.rpc_batch([("disconnectnode", [str(pid)]) for pid in peer_ids])
+        return len(peer_ids)
+
     def __repr__(self):
         status = "running" if self.is_running() else "stopped"
         return f"<TestNode {self.index} ({status})>"
@@ -1,81 +1,160 @@
 #!/usr/bin/env python3
 """Utility functions for functional tests."""
 
-import time
+import os
+import shutil
 import socket
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 
-def wait_until(predicate, timeout=10, check_interval=0.5):
+def wait_until(predicate, timeout=10, check_interval=0.2):
     """
     Wait until a predicate returns True.
 
+    Polls with exponential backoff: the first re-check comes after 5 ms and
+    the delay grows by 1.5x up to check_interval, so conditions that settle
+    quickly are seen quickly without busy-waiting on slow ones.
+
     Args:
         predicate: Callable that returns True when condition is met
         timeout: Maximum time to wait in seconds
-        check_interval: Time between checks in seconds
+        check_interval: Longest time between checks in seconds
 
     Returns:
         True if condition met, False if timeout
     """
-    start_time = time.time()
-    while time.time() - start_time < timeout:
+    deadline = time.monotonic() + timeout
+    delay = min(0.005, check_interval)
+    while True:
         if predicate():
             return True
-        time.sleep(check_interval)
-    return False
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
+        delay = min(check_interval, delay * 1.5)
 
 
-def connect_nodes(node_from, node_to):
+def connect_nodes(node_from, port, timeout=15, check_interval=0.2):
     """
-    Connect two test nodes.
+    Connect node_from to a node listening on a localhost port.
+
+    addnode is re-issued every check_interval seconds while node_from has
+    no peer entry for the target, which covers the window right after
+    start() where the target's listener is not bound yet. Returns as soon
+    as node_from reports the peer as connected.
 
     Args:
-        node_from: TestNode that initiates connection
-        node_to: TestNode to connect to
+        node_from: TestNode that initiates the connection
+        port: P2P port of the listening node
+        timeout: Maximum time to wait in seconds
+        check_interval: Time between attempts in seconds
 
     Returns:
-        True if connection successful
+        True if connected, False if timeout
     """
-    # Get node_to's listening address
-    # For now, nodes only support outbound connections in regtest
-    # This will be enhanced when we add P2P listening support
-    try:
-        node_from.add_node(f"127.0.0.1:{9000 + node_to.index}")
-        return True
-    except Exception as e:
-        print(f"Failed to connect nodes: {e}")
+    addr = f"127.0.0.1:{port}"
+
+    def connected():
+        try:
+            peers = node_from.get_peer_info()
+        except Exception:
+            return False
+        entries = [
+            p for p in peers
+            if not p.get("inbound") and str(p.get("addr", "")).endswith(f":{port}")
+        ] if isinstance(peers, list) else []
+        if any(p.get("connected") is True for p in entries):
+            return True
+        if not entries:
+            # No attempt in flight (first try, or the previous one was refused)
+            try:
+                node_from.add_node(addr, "add")
+            except Exception:
+                pass
         return False
 
+    return wait_until(connected, timeout=timeout, check_interval=check_interval)
+
 
-def sync_blocks(nodes, timeout=60):
+def sync_blocks(nodes, timeout=60, check_interval=0.05):
     """
     Wait for all nodes to have the same best block.
 
+    Every poll queries all nodes concurrently (rpc_batch_nodes), so a
+    check costs one RPC round-trip however many nodes there are.
+
     Args:
         nodes: List of TestNode instances
         timeout: Maximum time to wait in seconds
+        check_interval: Longest time between checks in seconds
 
     Returns:
         True if synced, False if timeout
     """
     def all_synced():
-        heights = []
-        hashes = []
-        for node in nodes:
-            try:
-                info = node.get_info()
-                heights.append(info.get("height", -1))
-                hashes.append(info.get("bestblockhash", ""))
-            except Exception:
-                return False
+        try:
+            infos = [r[0] for r in rpc_batch_nodes([(node, [("getinfo", [])]) for node in nodes])]
+            heights = [info.get("height", -1) for info in infos]
+            hashes = [info.get("bestblockhash", "") for info in infos]
+        except Exception:
+            return False
 
         # All heights must be equal and all hashes must be equal
         return len(set(heights)) == 1 and len(set(hashes)) == 1
 
-    return wait_until(all_synced, timeout=timeout)
+    return wait_until(all_synced, timeout=timeout, check_interval=check_interval)
+
+
+def wait_for_tip(node, target_hash, timeout=30, check_interval=0.02, max_rpc_interval=0.5):
+    """
+    Wait until a node's best block hash equals target_hash.
+
+    unicityd has no push notification interface, so growth of debug.log
+    (every tip change is logged) serves as the wakeup signal: the tip is
+    only queried over RPC when the log has changed, or at least every
+    max_rpc_interval seconds as a fallback.
+
+    Args:
+        node: TestNode instance
+        target_hash: Expected bestblockhash
+        timeout: Maximum time to wait in seconds
+        check_interval: Time between log size checks in seconds
+        max_rpc_interval: Longest gap between RPC tip queries in seconds
+
+    Returns:
+        True if the tip was reached, False if timeout
+    """
+    log_path = node.get_log_path()
+    last_size = None
+    last_rpc = 0.0
+    deadline = time.monotonic() + timeout
+    while True:
+        now = time.monotonic()
+        try:
+            size = log_path.stat().st_size
+        except FileNotFoundError:
+            size = -1
+        if size != last_size or now - last_rpc >= max_rpc_interval:
+            last_size = size
+            last_rpc = now
+            try:
+                if node.get_info().get("bestblockhash") == target_hash:
+                    return True
+            except Exception:
+                pass
+        if now >= deadline:
+            return False
+        time.sleep(check_interval)
 
 
-def wait_for_peers(node, peer_count, timeout=10):
+def wait_for_peers(node, peer_count, timeout=10, check_interval=0.05):
     """
     Wait for node to have a specific number of peers.
 
@@ -83,6 +162,7 @@ def wait_for_peers(node, peer_count, timeout=10):
         node: TestNode instance
         peer_count: Expected number of peers
         timeout: Maximum time to wait in seconds
+        check_interval: Longest time between checks in seconds
 
     Returns:
         True if peer count reached, False if timeout
@@ -94,8 +174,46 @@ def wait_for_peers(node, peer_count, timeout=10):
         except Exception:
             return False
 
-    return wait_until(has_peers, timeout=timeout)
+    return wait_until(has_peers, timeout=timeout, check_interval=check_interval)
+
+
+def reset_node_state(node):
+    """
+    Return a reused node to a clean state before the next script uses it.
+
+    Starts the node if a previous script left it stopped, drops every
+    peer, clears the banlist and disables mock time.
+    """
+    if not node.is_running():
+        node.start()
+    node.disconnect_all()
+    node.rpc_batch([("clearbanned", []), ("setmocktime", ["0"])])
+
+
+_rpc_pool = None
+_rpc_pool_lock = threading.Lock()
+
+
+def rpc_batch_nodes(batches, timeout=30):
+    """
+    Run one TestNode.rpc_batch() per node, all nodes concurrently.
+
+    Lets a poll that needs state from several nodes cost one round instead
+    of one round per node.
+
+    Args:
+        batches: Iterable of (node, calls) pairs; calls as for rpc_batch()
+        timeout: Maximum time to wait for every batch in seconds
 
+    Returns:
+        List of per-node result lists, in the same order as batches
+    """
+    global _rpc_pool
+    with _rpc_pool_lock:
+        if _rpc_pool is None:
+            _rpc_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="rpc")
+    futures = [_rpc_pool.submit(node.rpc_batch, calls, timeout) for node, calls in batches]
+    return [f.result() for f in futures]
 
 def pick_free_port():
     """Return an available localhost TCP port.
@@ -108,8 +226,235 @@ def pick_free_port():
         return s.getsockname()[1]
 
 
+
+def pick_free_ports(n):
+    """Return n distinct available localhost TCP ports.
+
+    All n sockets are held bound until every port is known, so the ports
+    can't collide with each other the way back-to-back pick_free_port()
+    calls can. The race against other processes is the same as for
+    pick_free_port().
+    """
+    socks = []
+    try:
+        for _ in range(n):
+            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            socks.append(s)
+            s.bind(("127.0.0.1", 0))
+        return [s.getsockname()[1] for s in socks]
+    finally:
+        for s in socks:
+            s.close()
+
 # Default Unicity regtest P2P base port (see include/network/protocol.hpp)
 REGTEST_BASE_PORT = 29590
 
 def regtest_base_port():
     return REGTEST_BASE_PORT
+
+
+def fast_copytree(src, dst):
+    """
+    Copy a directory tree, creating dst.
+
+    Walks with os.scandir so each entry's type comes from the directory
+    listing itself rather than a separate stat per entry. Symlinks are
+    copied as links.
+
+    Args:
+        src: Source directory
+        dst: Destination directory (must not exist)
+    """
+    os.makedirs(dst)
+    with os.scandir(src) as entries:
+        for entry in entries:
+            target = os.path.join(dst, entry.name)
+            if entry.is_symlink():
+                os.symlink(os.readlink(entry.path), target)
+            elif entry.is_dir():
+                fast_copytree(entry.path, target)
+            else:
+                shutil.copy2(entry.path, target)
+
+
+def tree_size(path):
+    """
+    Total size in bytes of the regular files under path.
+
+    One os.scandir pass per directory: entry types come from the listing
+    and each file is stat()ed once (symlinks are not followed).
+    """
+    total = 0
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                total += tree_size(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                total += entry.stat(follow_symlinks=False).st_size
+    return total
+
+
+def fast_rmtree(path):
+    """
+    Remove a directory tree, ignoring errors.
+
+    Uses rm -rf where available, so the per-entry unlink/rmdir loop runs in
+    native code rather than in Python; falls back to shutil.rmtree.
+
+    Args:
+        path: Directory to remove
+    """
+    if shutil.which("rm"):
+        subprocess.run(["rm", "-rf", "--", str(path)], check=False)
+    else:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def async_rmtree(path):
+    """
+    Remove a directory tree without blocking the caller.
+
+    The tree is first renamed to a sibling trash name, which is a single
+    rename(2), then deleted by a detached rm -rf in its own session, so
+    neither the caller nor interpreter exit waits for the deletion. If the
+    rename (or launching rm) fails, a background thread deletes the tree
+    in place instead.
+
+    Args:
+        path: Directory to remove
+    """
+    path = Path(path)
+    trash = path.with_name(f"{path.name}.trash.{os.getpid()}.{uuid.uuid4().hex[:8]}")
+    try:
+        path.rename(trash)
+    except FileNotFoundError:
+        return
+    except OSError:
+        trash = None
+
+    if trash is not None:
+        try:
+            subprocess.Popen(
+                ["rm", "-rf", "--", str(trash)],
+                start_new_session=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+            return
+        except OSError:
+            path = trash
+
+    threading.Thread(target=fast_rmtree, args=(path,)).start()
+
+
+_teardown_executor = None
+
+
+def set_teardown_executor(executor):
+    """Route defer_teardown() to an executor; None restores inline execution."""
+    global _teardown_executor
+    _teardown_executor = executor
+
+
+def defer_teardown(fn, *args, **kwargs):
+    """
+    Run a teardown step, in the background when an executor is installed.
+
+    Standalone scripts run fn inline. Under pytest, conftest.py installs a
+    session-wide executor so node shutdown and datadir removal overlap with
+    the next test's setup; it waits for all submitted steps at session end.
+    Errors are reported but never raised, matching a finally-block cleanup.
+    """
+    def run():
+        try:
+            fn(*args, **kwargs)
+        except Exception as e:
+            print(f"Teardown step {getattr(fn, '__name__', fn)} failed: {e}")
+
+    if _teardown_executor is None:
+        run()
+    else:
+        _teardown_executor.submit(run)
+
+
+def teardown_nodes(nodes, test_dir=None):
+    """Stop every running node, then remove test_dir (if given)."""
+    for node in nodes:
+        if node and node.is_running():
+            node.stop()
+    if test_dir is not None:
+        remove_test_dir(test_dir)
+
+
+_scratch_root = None
+
+
+def tmpdir_root():
+    """
+    Parent directory for test datadirs.
+
+    $UNICITY_TEST_TMPDIR when set (e.g. /dev/shm, so datadir writes and
+    their deletion stay in RAM), else None for the system temp dir.
+    """
+    return os.environ.get("UNICITY_TEST_TMPDIR") or None
+
+
+def tmpfs_root():
+    """
+    A writable in-memory directory for small datadirs, or None.
+
+    $XDG_RUNTIME_DIR (a per-user tmpfs on systemd systems), else /dev/shm.
+    """
+    for candidate in (os.environ.get("XDG_RUNTIME_DIR"), "/dev/shm"):
+        if candidate and os.path.isdir(candidate) and os.access(candidate, os.W_OK):
+            return candidate
+    return None
+
+
+def set_scratch_root(path):
+    """Create test dirs under path from now on; None restores per-test mkdtemp."""
+    global _scratch_root
+    _scratch_root = Path(path) if path is not None else None
+
+
+def make_test_dir(prefix="unicity_test_", prefer_tmpfs=False):
+    """
+    Create a fresh directory for one test's node datadirs.
+
+    Standalone scripts get their own mkdtemp() root (under tmpdir_root(),
+    or with prefer_tmpfs and no $UNICITY_TEST_TMPDIR, under tmpfs_root()).
+    Under pytest, conftest.py
+    installs one scratch root per worker and each test gets a subdirectory
+    of it, so the whole tree is removed once at session end.
+    """
+    if _scratch_root is None:
+        root = tmpdir_root() or (tmpfs_root() if prefer_tmpfs else None)
+        return Path(tempfile.mkdtemp(prefix=prefix, dir=root))
+    path = _scratch_root / f"{prefix}{uuid.uuid4().hex[:8]}"
+    path.mkdir()
+    return path
+
+
+def remove_test_dir(test_dir):
+    """Remove a make_test_dir() directory; scratch-root subdirs go with the root."""
+    test_dir = Path(test_dir)
+    if _scratch_root is not None and test_dir.parent == _scratch_root:
+        return
+    async_rmtree(test_dir)
+
+
+def preserve_test_dir(test_dir):
+    """
+    Keep a failed test's directory for debugging and return where it is.
+
+    Directories on disk under the system temp dir stay put; others (tmpfs,
+    or inside a scratch root removed at session end) are moved there as
+    unicity-failed-<timestamp>-<name>.
+    """
+    test_dir = Path(test_dir)
+    tmp = Path(tempfile.gettempdir())
+    if test_dir.parent == tmp:
+        return test_dir
+    kept = tmp / f"unicity-failed-{time.strftime('%Y%m%d-%H%M%S')}-{test_dir.name}"
+    shutil.move(str(test_dir), str(kept))
+    return kept
@@ -5,11 +5,12 @@ import sys
 import tempfile
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent / "test_framework"))
+from test_framework import BINARY_PATH
 from test_node import TestNode
 
 def main():
     test_dir = Path(tempfile.mkdtemp(prefix='test_miner_'))
-    binary_path = Path(__file__).parent.parent.parent / "build" / "bin" / "unicityd"
+    binary_path = BINARY_PATH
     
     print("Testing miner start/stop/restart...")
     node = TestNode(0, test_dir / 'node0', binary_path)
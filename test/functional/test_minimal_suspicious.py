@@ -2,15 +2,15 @@
 """Minimal test to isolate the RPC connection issue."""
 
 import sys
-import tempfile
-import shutil
 import time
 from pathlib import Path
 
 # Add test framework to path
 sys.path.insert(0, str(Path(__file__).parent / "test_framework"))
 
+from test_framework import BINARY_PATH
 from test_node import TestNode
+from util import make_test_dir, remove_test_dir
 
 
 def main():
@@ -18,8 +18,8 @@ def main():
     print("\n=== Minimal Suspicious Reorg Test ===\n")
 
     # Setup test directory
-    test_dir = Path(tempfile.mkdtemp(prefix="unicity_minimal_"))
-    binary_path = Path(__file__).parent.parent.parent / "build" / "bin" / "unicityd"
+    test_dir = make_test_dir("unicity_minimal_")
+    binary_path = BINARY_PATH
 
     node0 = None
 
@@ -58,7 +58,7 @@ def main():
             node0.stop()
 
         print(f"\nCleaning up test directory: {test_dir}")
-        shutil.rmtree(test_dir, ignore_errors=True)
+        remove_test_dir(test_dir)
 
 
 if __name__ == "__main__":
@@ -5,29 +5,434 @@ import sys
 import os
 import subprocess
 import argparse
+import atexit
+import fcntl
+import heapq
+import importlib.util
+import json
+import multiprocessing
+import re
+import signal
+import threading
 import time
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from xml.sax.saxutils import quoteattr
 
 
-def run_test(test_script, timeout):
-    """Run a single test script and return (success, duration)."""
-    print(f"\n{'=' * 60}")
-    print(f"Running: {test_script.name}")
-    print('=' * 60)
+# Lines of each script's output kept for the console (oldest dropped first)
+OUTPUT_TAIL_LINES = 5000
+
+# Serializes per-test output blocks when tests run concurrently
+_print_lock = threading.Lock()
+
+# Environment for test script interpreters. Unbuffered, so a script killed
+# on timeout still leaves all its output in the tail; no bytecode writes,
+# so concurrent scripts don't race to fill the same __pycache__.
+CHILD_ENV = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1", "PYTHONUNBUFFERED": "1"}
+
+# Scripts declaring this at module level are run in a forked runner
+# process instead of a fresh interpreter (see run_test)
+IN_PROCESS_RE = re.compile(r"^__in_process__\s*=\s*True\b", re.MULTILINE)
+
+# An in-process fork never execs, so it inherits every fd open in the
+# runner at that moment, close-on-exec or not. Every script launch (fork
+# or Popen) holds this from creating its output pipe until the runner has
+# closed the pipe's write end, so no fork can inherit another script's
+# write end and hold that pipe open past the script's exit.
+_fork_lock = threading.Lock()
+
 
-    start = time.time()
+def runs_in_process(test_script):
+    """True if test_script opts in to in-process runs with __in_process__ = True."""
     try:
-        result = subprocess.run(
-            [sys.executable, str(test_script)],
-            cwd=test_script.parent.parent.parent,
-            timeout=timeout
+        return IN_PROCESS_RE.search(test_script.read_text(errors="replace")) is not None
+    except OSError:
+        return False
+
+
+def preload_framework(test_dir):
+    """Import test_framework once, so forked in-process scripts inherit it."""
+    sys.path.insert(0, str(test_dir / "test_framework"))
+    import test_node  # noqa: F401
+    import util  # noqa: F401
+
+
+def _run_script_main(test_script, output_fd):
+    """Child side of an in-process run: import test_script and exit with main()'s result."""
+    os.dup2(output_fd, 1)
+    os.dup2(output_fd, 2)
+    os.close(output_fd)
+    # Same as CHILD_ENV gives subprocess scripts
+    sys.stdout = open(1, "w", errors="replace", buffering=1, closefd=False)
+    sys.dont_write_bytecode = True
+    sys.stderr = open(2, "w", errors="replace", buffering=1, closefd=False)
+    sys.argv = [str(test_script)]
+    try:
+        spec = importlib.util.spec_from_file_location(test_script.stem, test_script)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+        exitcode = module.main() or 0
+    except SystemExit as e:
+        exitcode = e.code if isinstance(e.code, int) else int(e.code is not None)
+    except BaseException:
+        traceback.print_exc()
+        exitcode = 1
+    # Exit here rather than through multiprocessing's bootstrap: its
+    # threading shutdown fails in a child forked from a worker thread
+    # (-j), and it skips atexit. Do what a normal interpreter exit does.
+    for thread in threading.enumerate():
+        if thread is not threading.current_thread() and not thread.daemon:
+            thread.join()
+    atexit._run_exitfuncs()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(exitcode)
+
+
+def _spawn_in_process(test_script):
+    """Fork a child running test_script's main(); returns (pid, wait, kill, returncode, stream)."""
+    with _fork_lock:
+        read_fd, write_fd = os.pipe()
+        child = multiprocessing.get_context("fork").Process(
+            target=_run_script_main, args=(test_script, write_fd), name=test_script.stem
         )
-        duration = time.time() - start
-        return (result.returncode == 0, duration)
+        child.start()
+        os.close(write_fd)
+
+    def wait(timeout):
+        child.join(timeout)
+        if child.is_alive():
+            raise subprocess.TimeoutExpired(test_script.name, timeout)
+
+    def kill():
+        child.kill()
+        child.join()
+
+    return child.pid, wait, kill, lambda: child.exitcode, open(read_fd, errors="replace")
+
+
+# Set by interrupt_running_tests() (--exitfirst); run_test() then starts nothing new
+_interrupted = threading.Event()
+_running_pids = {}  # test name -> pid of its script process
+_running_lock = threading.Lock()
+
+
+def interrupt_running_tests():
+    """
+    Stop every running test script and keep run_test() from starting more.
+
+    Scripts get SIGINT rather than SIGTERM: it surfaces as
+    KeyboardInterrupt, so their finally blocks still stop their nodes.
+    """
+    _interrupted.set()
+    with _running_lock:
+        for pid in _running_pids.values():
+            try:
+                os.kill(pid, signal.SIGINT)
+            except ProcessLookupError:
+                pass
+
+
+def run_test(test_script, timeout, in_process=False):
+    """
+    Run a single test script and return (success, duration), or None if
+    it was not started or was stopped by interrupt_running_tests().
+
+    The script's stdout and stderr go to one pipe, drained into a bounded
+    buffer and printed as a single block once the script finishes, so
+    concurrent tests never interleave. Scripts run unbuffered (see
+    CHILD_ENV), so a script killed on timeout loses none of its output.
+
+    With in_process, the script's main() runs in a fork of the runner
+    (which has already imported test_framework) rather than a new
+    interpreter; it is still a separate process, so a timeout kills it.
+    """
+    if _interrupted.is_set():
+        return None
+    start = time.perf_counter_ns()
+    if in_process:
+        pid, wait, kill, returncode, stream = _spawn_in_process(test_script)
+    else:
+        # Popen creates the pipe and closes its write end before returning
+        with _fork_lock:
+            process = subprocess.Popen(
+                [sys.executable, str(test_script)],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                errors="replace",
+                env=CHILD_ENV,
+                # No cwd and no fd closing (Python's own fds are non-inheritable
+                # anyway): that lets CPython launch via posix_spawn, not fork+exec.
+                # main() has already moved into the repo root for the children.
+                close_fds=False
+            )
+        pid, wait, returncode, stream = process.pid, process.wait, lambda: process.returncode, process.stdout
+
+        def kill():
+            process.kill()
+            process.wait()
+    with _running_lock:
+        _running_pids[test_script.name] = pid
+        if _interrupted.is_set():
+            # Interrupted between the check above and registering
+            os.kill(pid, signal.SIGINT)
+    tail = deque(maxlen=OUTPUT_TAIL_LINES)
+    line_count = [0]
+
+    def drain():
+        with stream:
+            for line in stream:
+                tail.append(line)
+                line_count[0] += 1
+
+    reader = threading.Thread(target=drain, daemon=True)
+    reader.start()
+    try:
+        wait(timeout)
+        timed_out = False
     except subprocess.TimeoutExpired:
-        print(f"✗ TIMEOUT after {timeout}s: {test_script.name}")
-        duration = time.time() - start
-        return (False, duration)
+        kill()
+        timed_out = True
+    with _running_lock:
+        del _running_pids[test_script.name]
+    # A leftover grandchild holding the pipe must not stall the runner
+    reader.join(timeout=5)
+    duration = (time.perf_counter_ns() - start) / 1e9
+    interrupted = _interrupted.is_set() and returncode() != 0
+
+    parts = [f"\n{'=' * 60}\nRunning: {test_script.name}\n{'=' * 60}\n"]
+    if line_count[0] > len(tail):
+        parts.append(f"[... {line_count[0] - len(tail)} earlier lines omitted ...]\n")
+    parts.extend(tail)
+    if timed_out:
+        parts.append(f"✗ TIMEOUT after {timeout}s: {test_script.name}\n")
+    elif interrupted:
+        parts.append(f"✗ INTERRUPTED (--exitfirst): {test_script.name}\n")
+    with _print_lock:
+        sys.stdout.write("".join(parts))
+        sys.stdout.flush()
+    if interrupted:
+        return None
+    return (not timed_out and returncode() == 0, duration)
+
+
+# Durations, manifest, --async state and log, relative to test/functional.
+# Kept out of the directory itself, whose mtime keys the manifest.
+RUNNER_DIR = ".runner"
+
+# Script name prefixes (before the first "_") the runner picks up
+TEST_PREFIXES = frozenset({"feature", "test", "p2p", "rpc", "basic", "consensus", "orphan"})
+
+
+def is_test_script(name):
+    """True for "<prefix>_*.py" names with a prefix in TEST_PREFIXES."""
+    prefix, sep, _ = name.partition("_")
+    return bool(sep) and prefix in TEST_PREFIXES and name.endswith(".py")
+
+
+def discover_scripts(test_dir, manifest_path):
+    """
+    Return the sorted names of the test scripts in test_dir.
+
+    The listing is cached in manifest_path along with the directory's
+    mtime, which changes whenever a file is added, removed or renamed, so
+    repeated invocations (shards, -k loops) skip the directory scan. The
+    runner's own files live in RUNNER_DIR so they don't move that mtime.
+    """
+    mtime_ns = test_dir.stat().st_mtime_ns
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest["mtime_ns"] == mtime_ns:
+            return manifest["test_scripts"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    with os.scandir(test_dir) as entries:
+        names = sorted(
+            entry.name for entry in entries
+            if is_test_script(entry.name) and entry.is_file()
+        )
+    try:
+        with open(manifest_path, "w") as f:
+            json.dump({"mtime_ns": mtime_ns, "test_scripts": names}, f, indent=2)
+    except OSError:
+        pass
+    return names
+
+
+def parse_shard(value):
+    """Parse an --shard "i/N" argument into (i, N), with 0 <= i < N."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N, got {value!r}")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must be in [0, N), got {value!r}")
+    return index, count
+
+
+def load_durations(path):
+    """Last recorded per-test durations {name: seconds}; empty if unavailable."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def select_shard(test_scripts, index, count, durations):
+    """
+    Return the scripts belonging to shard index of count.
+
+    With recorded durations, tests are dealt longest first to whichever
+    shard has the least total time so far (LPT), so shards finish at about
+    the same time; unseen tests count as the longest. Without them, the
+    sorted list is dealt round-robin. Every shard computes the same
+    assignment, so each test lands in exactly one shard.
+    """
+    if not durations:
+        return [t for idx, t in enumerate(test_scripts) if idx % count == index]
+
+    unseen = max(durations.values(), default=0.0) + 1.0
+    ordered = sorted(test_scripts, key=lambda t: (-durations.get(t.name, unseen), t.name))
+    loads = [(0.0, shard) for shard in range(count)]
+    selected = []
+    for test_script in ordered:
+        load, shard = heapq.heappop(loads)
+        if shard == index:
+            selected.append(test_script)
+        heapq.heappush(loads, (load + durations.get(test_script.name, unseen), shard))
+    return sorted(selected)
+
+
+class JUnitReport:
+    """
+    JUnit XML report written one <testcase> at a time, as tests finish.
+
+    The testsuite's tests/failures counts come before the testcases, so
+    close() seeks back and rewrites them in a space-padded slot.
+    """
+
+    # Room for both count attributes; the unused part is whitespace
+    COUNTS_WIDTH = 40
+
+    def __init__(self, path):
+        self.file = open(path, "wb")
+        self.tests = 0
+        self.failures = 0
+        self.file.write(b'<?xml version="1.0" encoding="utf-8"?>\n<testsuite name="functional" ')
+        self.counts_offset = self.file.tell()
+        self._write_counts()
+        self.file.write(b">\n")
+
+    def _write_counts(self):
+        counts = f'tests="{self.tests}" failures="{self.failures}"'
+        self.file.write(counts.ljust(self.COUNTS_WIDTH).encode())
+
+    def add(self, name, success, duration):
+        self.tests += 1
+        case = f"  <testcase name={quoteattr(name)} time=\"{duration:.3f}\""
+        if success:
+            case += " />\n"
+        else:
+            self.failures += 1
+            case += ('>\n    <failure message="Test failed">See console output for details</failure>\n'
+                     "  </testcase>\n")
+        self.file.write(case.encode("utf-8"))
+        self.file.flush()
+
+    def close(self):
+        self.file.write(b"</testsuite>\n")
+        self.file.seek(self.counts_offset)
+        self._write_counts()
+        self.file.close()
+
+
+def print_summary(records):
+    """Print the results table for (name, success, duration) records, by name; returns the failure count."""
+    print(f"\n{'=' * 60}")
+    print("Test Summary")
+    print('=' * 60)
+
+    passed = sum(1 for _, success, _ in records if success)
+    failed = len(records) - passed
+
+    for test_name, success, duration in sorted(records):
+        status = "✓ PASSED" if success else "✗ FAILED"
+        print(f"{status}: {test_name} ({duration:.1f}s)")
+
+    print(f"\n{passed} passed, {failed} failed out of {len(records)} tests")
+    return failed
+
+
+def daemonize(log_path):
+    """
+    Detach from the terminal (fork, setsid, fork) with output going to log_path.
+
+    Returns False in the calling process and True in the detached one.
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    child = os.fork()
+    if child > 0:
+        os.waitpid(child, 0)
+        return False
+    os.setsid()
+    if os.fork() > 0:
+        os._exit(0)
+    with open(os.devnull) as devnull, open(log_path, "w") as log:
+        os.dup2(devnull.fileno(), 0)
+        os.dup2(log.fileno(), 1)
+        os.dup2(log.fileno(), 2)
+    return True
+
+
+def write_state(path, state):
+    """Replace the --async state file with state (readers never see a partial file)."""
+    tmp = path.with_name(f"{path.name}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+def background_run_active(pid_path):
+    """True while a detached runner holds the pidfile lock."""
+    try:
+        with open(pid_path) as f:
+            fcntl.flock(f, fcntl.LOCK_SH | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return True
+    except OSError:
+        pass
+    return False
+
+
+def show_status(state_path, pid_path):
+    """Print the progress of the last --async run (--status)."""
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        print("No background run recorded")
+        return 1
+
+    print(f"Background run started {state['started']} (pid {state['pid']}), log: {state['log']}")
+    done = state["results"]
+    failed = print_summary([(name, r["success"], r["duration"]) for name, r in done.items()])
+    if not state["finished"]:
+        pending = len(state["tests"]) - len(done)
+        if background_run_active(pid_path):
+            print(f"Still running: {pending} test(s) not finished yet")
+        else:
+            print(f"Runner exited early: {pending} test(s) never finished (see the log)")
+            return 1
+    return 0 if failed == 0 else 1
 
 
 def main():
@@ -36,9 +441,37 @@ def main():
     parser.add_argument("-k", dest="pattern", default="", help="Filter tests by substring match")
     parser.add_argument("--junit", dest="junit", default="", help="Write JUnit XML report to path")
     parser.add_argument("--timeout", dest="timeout", type=int, default=900, help="Per-test timeout (seconds)")
+    parser.add_argument("-j", "--jobs", dest="jobs", type=int, default=1,
+                        help="Tests to run concurrently; 0 = CPU count - 2 (default: 1, since some "
+                             "scripts still bind fixed P2P ports)")
+    parser.add_argument("--shard", dest="shard", type=parse_shard, default=None,
+                        help="Run only shard i of N (0-based, e.g. 0/4) for splitting across CI workers")
+    parser.add_argument("-x", "--exitfirst", dest="exitfirst", action="store_true",
+                        help="Stop at the first failure: skip queued tests and interrupt running ones")
+    parser.add_argument("--async", dest="run_async", action="store_true",
+                        help="Run detached in the background; follow progress with --status")
+    parser.add_argument("--status", dest="status", action="store_true",
+                        help="Show the progress or results of the last --async run")
     args = parser.parse_args()
 
-    test_dir = Path(__file__).parent
+    test_dir = Path(__file__).resolve().parent
+    runner_dir = test_dir / RUNNER_DIR
+    state_path = runner_dir / "state.json"
+    pid_path = runner_dir / "pid"
+    log_path = runner_dir / "log"
+
+    if args.status:
+        return show_status(state_path, pid_path)
+    try:
+        runner_dir.mkdir(exist_ok=True)
+    except OSError:
+        pass
+
+    # Tests run from the repo root; chdir once here so run_test() needn't
+    # pass cwd (see there). Resolve user-supplied paths first.
+    if args.junit:
+        args.junit = os.path.abspath(args.junit)
+    os.chdir(test_dir.parent.parent)
 
     # Files to exclude (setup scripts, debug scripts, and infrastructure)
     exclude_files = {
@@ -59,13 +492,19 @@ def main():
         "adversarial_framing_wire.py",     # Wire-level: framing errors (opt-in)
     }
 
-    # Find all test scripts (only feature_* and test_* files)
-    test_scripts = []
-    for file in sorted(test_dir.glob("*.py")):
-        if file.name not in exclude_files and not file.name.startswith("_"):
-            if file.name.startswith(("feature_", "test_", "p2p_", "rpc_", "basic_", "consensus_", "orphan_")):
-                if not args.pattern or args.pattern in file.name:
-                    test_scripts.append(file)
+    # Find all test scripts (only TEST_PREFIXES files)
+    test_scripts = [
+        test_dir / name for name in discover_scripts(test_dir, runner_dir / "manifest.json")
+        if name not in exclude_files and (not args.pattern or args.pattern in name)
+    ]
+
+    durations_path = runner_dir / "durations.json"
+    known_durations = load_durations(durations_path)
+
+    if args.shard:
+        index, count = args.shard
+        test_scripts = select_shard(test_scripts, index, count, known_durations)
+        print(f"Shard {index}/{count}")
 
     if not test_scripts:
         print("No test scripts found!")
@@ -73,45 +512,110 @@ def main():
 
     print(f"Found {len(test_scripts)} test(s)")
 
-    # Run all tests
-    results = {}
-    durations = {}
-    for test_script in test_scripts:
-        success, duration = run_test(test_script, timeout=args.timeout)
-        results[test_script.name] = success
-        durations[test_script.name] = duration
-
-    # Print summary
-    print(f"\n{'=' * 60}")
-    print("Test Summary")
-    print('=' * 60)
+    jobs = args.jobs if args.jobs > 0 else max(1, (os.cpu_count() or 2) - 2)
 
-    passed = sum(1 for success in results.values() if success)
-    failed = len(results) - passed
+    in_process = {t for t in test_scripts if runs_in_process(t)}
+    if in_process:
+        preload_framework(test_dir)
 
-    for test_name, success in results.items():
-        status = "✓ PASSED" if success else "✗ FAILED"
-        print(f"{status}: {test_name} ({durations[test_name]:.1f}s)")
+    state = None
+    if args.run_async:
+        # Locked before detaching, so a second --async fails here; the
+        # detached process inherits the lock and holds it until it exits
+        pidfile = open(pid_path, "a+")
+        try:
+            fcntl.flock(pidfile, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            print(f"A background run is already active (see {pid_path})")
+            return 1
+        if not daemonize(log_path):
+            print(f"Running in the background, output in {log_path}")
+            print("Check progress with: test_runner.py --status")
+            return 0
+        pidfile.truncate(0)
+        pidfile.write(f"{os.getpid()}\n")
+        pidfile.flush()
+        state = {
+            "pid": os.getpid(),
+            "started": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "log": str(log_path),
+            "tests": [t.name for t in test_scripts],
+            "results": {},
+            "finished": False,
+        }
+        write_state(state_path, state)
 
-    print(f"\n{passed} passed, {failed} failed out of {len(results)} tests")
+    # Run all tests
+    records = []  # (name, success, duration)
 
-    # Optional JUnit output
+    # Optional JUnit output, written as tests finish
+    junit = None
     if args.junit:
         try:
-            from xml.etree.ElementTree import Element, SubElement, ElementTree
-            ts = Element("testsuite", name="functional", tests=str(len(results)), failures=str(failed))
-            for name, success in results.items():
-                tc = SubElement(ts, "testcase", name=name, time=f"{durations[name]:.3f}")
-                if not success:
-                    failure = SubElement(tc, "failure", message="Test failed")
-                    failure.text = "See console output for details"
-            tree = ElementTree(ts)
-            with open(args.junit, "wb") as f:
-                tree.write(f, encoding="utf-8", xml_declaration=True)
+            junit = JUnitReport(args.junit)
+        except OSError as e:
+            print(f"Failed to write JUnit report: {e}")
+
+    def record(name, success, duration):
+        nonlocal junit
+        records.append((name, success, duration))
+        if junit is not None:
+            try:
+                junit.add(name, success, duration)
+            except OSError as e:
+                print(f"Failed to write JUnit report: {e}")
+                junit = None
+        if state is not None:
+            state["results"][name] = {"success": success, "duration": duration}
+            write_state(state_path, state)
+
+    if jobs == 1:
+        for test_script in test_scripts:
+            success, duration = run_test(test_script, timeout=args.timeout,
+                                         in_process=test_script in in_process)
+            record(test_script.name, success, duration)
+            if args.exitfirst and not success:
+                break
+    else:
+        # Tests wait on their own subprocesses, so threads are enough here.
+        # Longest (by last recorded time) first, unseen tests before all.
+        print(f"Running with {jobs} jobs")
+        dispatch = sorted(test_scripts, key=lambda t: -known_durations.get(t.name, float("inf")))
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(run_test, t, args.timeout, t in in_process): t for t in dispatch}
+            for future in as_completed(futures):
+                if future.cancelled() or future.result() is None:
+                    continue  # skipped or interrupted by --exitfirst
+                success, duration = future.result()
+                record(futures[future].name, success, duration)
+                if args.exitfirst and not success and not _interrupted.is_set():
+                    for pending in futures:
+                        pending.cancel()
+                    interrupt_running_tests()
+
+    failed = print_summary(records)
+    if len(records) < len(test_scripts):
+        print(f"{len(test_scripts) - len(records)} test(s) not run or interrupted (--exitfirst)")
+
+    if junit is not None:
+        try:
+            junit.close()
             print(f"JUnit report written to {args.junit}")
-        except Exception as e:
+        except OSError as e:
             print(f"Failed to write JUnit report: {e}")
 
+    # Remember durations for scheduling and sharding of later runs
+    known_durations.update((name, duration) for name, _, duration in records)
+    try:
+        with open(durations_path, "w") as f:
+            json.dump(known_durations, f, indent=2, sort_keys=True)
+    except OSError as e:
+        print(f"Failed to write {durations_path.name}: {e}")
+
+    if state is not None:
+        state["finished"] = True
+        write_state(state_path, state)
+
     return 0 if failed == 0 else 1
 
 
@@ -1,52 +1,59 @@
 #!/usr/bin/env python3
 """Test starting two nodes with different suspiciousreorgdepth settings."""
 
+import argparse
 import sys
-import tempfile
-import shutil
-import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add test framework to path
 sys.path.insert(0, str(Path(__file__).parent / "test_framework"))
 
+from test_framework import BINARY_PATH
 from test_node import TestNode
-from util import pick_free_port
+from util import make_test_dir, pick_free_ports, preserve_test_dir, remove_test_dir
+from shared_datadir import get_template_datadir, clone_datadir
 
 
-def main():
-    """Run two-node test."""
+def main(keep=False):
+    """Run two-node test; keep leaves the test directory in place even on success."""
     print("\n=== Two Node Test ===\n")
 
-    # Setup test directory
-    test_dir = Path(tempfile.mkdtemp(prefix="unicity_two_nodes_"))
-    binary_path = Path(__file__).parent.parent.parent / "build" / "bin" / "unicityd"
+    # Setup test directory (in memory where possible: two small datadirs)
+    test_dir = make_test_dir("unicity_two_nodes_", prefer_tmpfs=True)
+    passed = False
+    binary_path = BINARY_PATH
 
     node0 = None
     node1 = None
 
     try:
         # Dynamic ports
-        port0 = pick_free_port()
-        port1 = pick_free_port()
+        port0, port1 = pick_free_ports(2)
 
-        # Start node0 with default limit (100)
-        print("Starting node0 (default suspiciousreorgdepth=100)...")
-        node0 = TestNode(0, test_dir / "node0", binary_path,
-                        extra_args=["--listen", f"--port={port0}", "--verbose"])
-
-        print("Calling node0.start()...")
-        node0.start()
-        print("✓ node0.start() returned successfully!")
+        # Both nodes start from a copy of an already-initialized datadir
+        template = get_template_datadir(binary_path)
 
-        # Start node1 with custom limit (5)
-        print("\nStarting node1 (suspiciousreorgdepth=5)...")
-        node1 = TestNode(1, test_dir / "node1", binary_path,
+        # node0 with default limit (100), node1 with custom limit (5)
+        node0 = TestNode(0, clone_datadir(template, test_dir / "node0"), binary_path,
+                        extra_args=["--listen", f"--port={port0}", "--verbose"])
+        node1 = TestNode(1, clone_datadir(template, test_dir / "node1"), binary_path,
                         extra_args=["--listen", f"--port={port1}", "--suspiciousreorgdepth=5"])
 
-        print("Calling node1.start()...")
-        node1.start()
-        print("✓ node1.start() returned successfully!")
+        # The nodes are independent, so start both at once
+        print("Starting node0 (default suspiciousreorgdepth=100) and node1 (suspiciousreorgdepth=5)...")
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            starts = [(name, pool.submit(node.start)) for name, node in (("node0", node0), ("node1", node1))]
+        # Report each node before raising, so a failure names the node(s)
+        errors = [(name, future.exception()) for name, future in starts]
+        for name, error in errors:
+            if error is None:
+                print(f"✓ {name}.start() returned successfully!")
+            else:
+                print(f"✗ {name}.start() failed: {error}")
+        for _, error in errors:
+            if error is not None:
+                raise error
 
         # Test both nodes
         print("\nGetting info from both nodes...")
@@ -57,6 +64,7 @@ def main():
         print(f"✓ Node1: blocks={info1['blocks']}")
 
         print("\n✓ Two-node test passed!")
+        passed = True
         return 0
 
     except Exception as e:
@@ -74,16 +82,22 @@ def main():
         return 1
 
     finally:
-        # Cleanup
-        if node0 and node0.is_running():
-            node0.stop()
-        if node1 and node1.is_running():
-            node1.stop()
+        # Cleanup: signal both nodes first so their shutdowns overlap
+        nodes = [n for n in (node0, node1) if n]
+        for node in nodes:
+            node.stop_async()
+        for node in nodes:
+            node.wait_stopped(10)
 
-        print(f"\nKeeping test directory for debugging: {test_dir}")
-        # TEMPORARILY DISABLED FOR DEBUGGING
-        # shutil.rmtree(test_dir, ignore_errors=True)
+        if keep:
+            print(f"\nKeeping test directory: {test_dir}")
+        elif passed:
+            remove_test_dir(test_dir)
+        else:
+            print(f"\nKeeping test directory for debugging: {preserve_test_dir(test_dir)}")
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--keep", action="store_true", help="Keep the test directory even if the test passes")
+    sys.exit(main(keep=parser.parse_args().keep))
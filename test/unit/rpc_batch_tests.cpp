@@ -0,0 +1,98 @@
+// RPC request dispatch: batch arrays and the single-recv size limit
+
+#include "catch_amalgamated.hpp"
+#include "network/rpc_server.hpp"
+#include "util/string_parsing.hpp"
+#include <nlohmann/json.hpp>
+
+using namespace unicity;
+using namespace unicity::rpc;
+using json = nlohmann::json;
+
+namespace {
+
+// Stand-in for RPCServer::ExecuteCommand: echoes the call as JSON, answers
+// "text" with non-JSON output and anything unknown with an error.
+std::string Execute(const std::string &method,
+                    const std::vector<std::string> &params) {
+  if (method == "echo") {
+    return json{{"method", method}, {"params", params}}.dump() + "\n";
+  }
+  if (method == "text") {
+    return "plain text\n";
+  }
+  return util::JsonError("Unknown command");
+}
+
+} // namespace
+
+TEST_CASE("RPC dispatch - single request object", "[rpc]") {
+  json reply = json::parse(
+      DispatchRequest(R"({"method":"echo","params":["a",1]})", Execute));
+  REQUIRE(reply["method"] == "echo");
+  REQUIRE(reply["params"] == json::array({"a", "1"}));
+}
+
+TEST_CASE("RPC dispatch - batch array in, array out", "[rpc]") {
+  json reply = json::parse(DispatchRequest(
+      R"([{"method":"echo","params":["x"]},{"method":"echo"},{"method":"text"}])",
+      Execute));
+  REQUIRE(reply.is_array());
+  REQUIRE(reply.size() == 3);
+  REQUIRE(reply[0]["params"] == json::array({"x"}));
+  REQUIRE(reply[1]["params"] == json::array());
+  // Non-JSON handler output comes back as a JSON string
+  REQUIRE(reply[2] == "plain text\n");
+}
+
+TEST_CASE("RPC dispatch - bad batch element does not fail the batch", "[rpc]") {
+  json reply = json::parse(DispatchRequest(
+      R"([{"method":"echo"},{"params":[]},42,{"method":"nosuch"},{"method":"echo","params":["z"]}])",
+      Execute));
+  REQUIRE(reply.size() == 5);
+  REQUIRE(reply[0]["method"] == "echo");
+  REQUIRE(reply[1]["error"] == "Missing or invalid method field");
+  REQUIRE(reply[2]["error"] == "Missing or invalid method field");
+  REQUIRE(reply[3]["error"] == "Unknown command");
+  REQUIRE(reply[4]["params"] == json::array({"z"}));
+}
+
+TEST_CASE("RPC dispatch - empty batch", "[rpc]") {
+  REQUIRE(DispatchRequest("[]", Execute) == "[]\n");
+}
+
+TEST_CASE("RPC dispatch - invalid JSON", "[rpc]") {
+  REQUIRE(json::parse(DispatchRequest("[{", Execute))["error"] ==
+          "Invalid JSON");
+}
+
+TEST_CASE("RPC dispatch - request size limit", "[rpc]") {
+  // Build a batch of echo calls padded to exactly `size` bytes
+  auto batch_of_size = [](size_t size) {
+    std::string head = R"([{"method":"echo","params":[")";
+    std::string tail = R"("]}])";
+    return head + std::string(size - head.size() - tail.size(), 'p') + tail;
+  };
+
+  SECTION("just under the limit is executed") {
+    std::string request = batch_of_size(MAX_RPC_REQUEST_SIZE - 1);
+    REQUIRE(request.size() == MAX_RPC_REQUEST_SIZE - 1);
+    json reply = json::parse(DispatchRequest(request, Execute));
+    REQUIRE(reply.is_array());
+    REQUIRE(reply.size() == 1);
+    REQUIRE(reply[0]["method"] == "echo");
+  }
+
+  SECTION("a request filling the recv buffer is rejected unparsed") {
+    bool executed = false;
+    auto execute = [&](const std::string &method,
+                       const std::vector<std::string> &params) {
+      executed = true;
+      return Execute(method, params);
+    };
+    std::string request = batch_of_size(MAX_RPC_REQUEST_SIZE);
+    json reply = json::parse(DispatchRequest(request, execute));
+    REQUIRE(reply["error"] == "Request too large");
+    REQUIRE_FALSE(executed);
+  }
+}